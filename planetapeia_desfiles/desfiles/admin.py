@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.contrib.auth.models import User
 
 from .admins.convite import ConviteAdmin
 from .admins.desfile import DesfileAdmin
@@ -8,6 +9,7 @@ from .admins.pessoa import PessoaAdmin
 from .admins.staff import StaffPadraoVeiculoAdmin, StaffsAdmin
 from .admins.traje import TrajeAdmin, TrajeInventarioAdmin, TrajeHistoricoAdmin
 from .admins.user_messages import UserMessagesAdmin
+from .admins.usuario import UsuarioAdmin
 from .admins.veiculo import VeiculoAdmin
 from .admins.config import ConfigAdmin
 from .admins.localizacao import LocalizacaoAdmin
@@ -51,5 +53,8 @@ admin.site.register(UserMessage, UserMessagesAdmin)
 admin.site.register(PessoaRevisarSenha, RevisaoSenhaAdmin)
 
 admin.site.register(TrajeHistorico, TrajeHistoricoAdmin)
+
+admin.site.unregister(User)
+admin.site.register(User, UsuarioAdmin)
 admin.site.site_title = "Planetapéia Desfiles"
 admin.site.site_header = "Planetapéia Desfiles"
@@ -4,6 +4,7 @@ from ..models import InscricaoDesfile
 
 class InscricaoDesfileInline(admin.TabularInline):
     model = InscricaoDesfile
+    autocomplete_fields = ["pessoa", "aprovador"]
     # TODO: Obter os veículos do desfile
 
 
@@ -16,7 +17,9 @@ class ConviteAdmin(admin.ModelAdmin):
         "data",
         "max_convidados",
         "convidados_confirmados",
+        "vagas_reservadas",
         "hash",
     ]
-    readonly_fields = ["data", "hash", "convidados_confirmados"]
+    readonly_fields = ["data", "hash", "convidados_confirmados", "vagas_reservadas"]
+    autocomplete_fields = ["usuario"]
     inlines = [InscricaoDesfileInline]
@@ -1,12 +1,54 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.models import User
 from django.http.request import HttpRequest
 
 from ..models import Desfile
+from ..services.alocacao_veiculos import (
+    PlanoAlocacao,
+    aplicar_plano,
+    planejar_alocacao,
+)
 from ..services.date_time_provider import DateTimeProvider
 
+# Violações exibidas individualmente nas mensagens do admin
+MAX_VIOLACOES_EXIBIDAS = 10
+
+
+def _mensagens_plano(request: HttpRequest, plano: PlanoAlocacao):
+    messages.info(request, f"{plano.desfile}: {plano}")
+    for ocupacao in plano.ocupacoes:
+        messages.info(
+            request,
+            f"{ocupacao.veiculo}: {ocupacao.perfil.participantes} convidados "
+            f"({ocupacao.vagas} vagas), {ocupacao.perfil.staffs} staffs, "
+            f"{ocupacao.perfil.criancas} crianças, {ocupacao.perfil.peso}kg",
+        )
+    for violacao in plano.violacoes[:MAX_VIOLACOES_EXIBIDAS]:
+        messages.warning(request, str(violacao))
+    if len(plano.violacoes) > MAX_VIOLACOES_EXIBIDAS:
+        messages.warning(
+            request,
+            f"... mais {len(plano.violacoes) - MAX_VIOLACOES_EXIBIDAS} inscrições sem alocação",
+        )
+
+
+@admin.action(description="Simular alocação nos veículos")
+def simular_alocacao(modeladmin, request, queryset):
+    for desfile in queryset:
+        _mensagens_plano(request, planejar_alocacao(desfile))
+
+
+@admin.action(description="Alocar inscrições nos veículos")
+def alocar_inscricoes(modeladmin, request, queryset):
+    for desfile in queryset:
+        plano = planejar_alocacao(desfile)
+        alteradas = aplicar_plano(plano)
+        _mensagens_plano(request, plano)
+        messages.success(request, f"{desfile}: {alteradas} inscrições alteradas")
+
 
 class DesfileAdmin(admin.ModelAdmin):
+    actions = [simular_alocacao, alocar_inscricoes]
     fields = [
         "nome",
         ("local", "data"),
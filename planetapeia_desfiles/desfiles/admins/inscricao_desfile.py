@@ -1,35 +1,32 @@
-from collections import defaultdict
-
 from django.contrib import admin, messages
 from django.urls import reverse
 
-from ..models import AprovacaoChoices
-from ..services.date_time_provider import DateTimeProvider
+from ..services import desfile_service
+from ..services.busca_pessoa import buscar_pessoas
 from ..services.user_messages import UserMessages
 
 
 @admin.action(description="Aprovar")
 def aprovar_inscricao(modeladmin, request, queryset):
-    outros_aprovadores = defaultdict(list)
-    for inscricao in queryset:
-        if inscricao.aprovacao == AprovacaoChoices.REJEITADO:
-            if inscricao.aprovador == request.user:
-                inscricao.aprovacao = AprovacaoChoices.APROVADO
-                inscricao.data_aprovacao = DateTimeProvider.now()
-                inscricao.save()
-                messages.success(request, str(inscricao))
-            else:
-                messages.warning(request, f"Rejeição por outro admin: {inscricao}")
-                outros_aprovadores[inscricao.aprovador].append(inscricao)
-        elif inscricao.aprovacao == AprovacaoChoices.PENDENTE:
-            inscricao.aprovacao = AprovacaoChoices.APROVADO
-            inscricao.data_aprovacao = DateTimeProvider.now()
-            inscricao.aprovador = request.user
-            inscricao.save()
-            messages.success(request, str(inscricao))
-    if outros_aprovadores:
+    resultado = desfile_service.aprovar_inscricoes(
+        queryset.values_list("pk", flat=True), request.user
+    )
+    if aprovadas := len(resultado.aprovadas):
+        messages.success(
+            request,
+            f"{aprovadas} {'inscrição aprovada' if aprovadas == 1 else 'inscrições aprovadas'}",
+        )
+    if resultado.ja_aprovadas:
+        messages.info(
+            request, f"{len(resultado.ja_aprovadas)} inscrições já estavam aprovadas"
+        )
+    for inscricao in resultado.sem_veiculo:
+        messages.warning(request, f"Inscrição sem veículo: {inscricao}")
+    if resultado.rejeitadas_por_outros:
         um = UserMessages(request)
-        for outro_aprovador, inscricoes in outros_aprovadores.items():
+        for outro_aprovador, inscricoes in resultado.rejeitadas_por_outros.items():
+            for inscricao in inscricoes:
+                messages.warning(request, f"Rejeição por outro admin: {inscricao}")
             texto_inscricoes = ", ".join(str(inscricao) for inscricao in inscricoes)
             um.send_message(
                 outro_aprovador,
@@ -48,10 +45,28 @@ class InscricaoDesfileAdmin(admin.ModelAdmin):
         "status_aprovacao",
     ]
     search_fields = ["pessoa__nome"]
+    autocomplete_fields = ["pessoa", "aprovador"]
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related(
+                "desfile", "pessoa", "grupo", "aprovador", "convite__usuario"
+            )
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            pessoa__in=buscar_pessoas(search_term).values("pk")
+        ), False
 
     @admin.display(description="Responsável pelo convite")
     def responsavel_convite(self, obj):
-        return obj.convite.usuario.get_full_name() or obj.convite.usuario
+        if obj.convite:
+            return obj.convite.usuario.get_full_name() or obj.convite.usuario
 
     @admin.display(description="Aprovação")
     def status_aprovacao(self, obj):
@@ -1,15 +1,18 @@
 from datetime import date
 
 from django.contrib import admin
+from django.urls import reverse
 from django.utils.html import format_html
 
 from ..models import Pessoa, TiposCobrancaTrajeChoices
+from ..services.busca_pessoa import buscar_pessoas
 
 
 class PessoaAdmin(admin.ModelAdmin):
     list_display = ("nome", "grupo", "cpf", "image_tag")
     list_filter = ("grupo", "tipo")
     sortable_by = ["nome"]
+    ordering = ["nome"]
     list_select_related = True
     fields = [
         ("cpf", "nome"),
@@ -21,10 +24,25 @@ class PessoaAdmin(admin.ModelAdmin):
     readonly_fields = ["cobrar_traje_str", "idade"]
     search_fields = ["nome"]
 
+    @admin.display(description="Foto")
     def image_tag(self, obj: Pessoa):
-        return format_html('<img src="{}" width="128" />'.format(obj.get_foto()))
+        # Somente o manifesto de miniaturas: as que faltam são geradas pelo
+        # endpoint quando o navegador carrega a imagem
+        if not (url := obj.get_miniatura(128)):
+            url = (
+                reverse("api_miniatura", args=[obj.pk, 128])
+                if obj.foto
+                else obj.get_icone()
+            )
+        return format_html('<img src="{}" width="128" loading="lazy" />', url)
 
-    image_tag.short_description = "Foto"
+    def get_search_results(self, request, queryset, search_term):
+        # Usado também pelo autocomplete dos campos de pessoa nos outros admins
+        if not search_term:
+            return queryset, False
+        if (cpf := "".join(c for c in search_term if c.isnumeric())) and len(cpf) == 11:
+            return queryset.filter(pk=cpf), False
+        return buscar_pessoas(search_term, queryset), False
 
     @admin.display(description="Cobrar traje")
     def cobrar_traje_str(self, obj):
@@ -1,16 +1,25 @@
 import logging
+from datetime import timedelta
 
 from django.contrib import admin
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.forms.models import ModelMultipleChoiceField
 from django.http.request import HttpRequest
 
-from ..models import PessoaStaff, StaffPadrao, StaffPadraoVeiculo, TiposPessoasChoices
+from ..models import (
+    PessoaStaff,
+    StaffPadrao,
+    StaffPadraoVeiculo,
+    TiposPessoasChoices,
+    Veiculo,
+)
+from ..services.metadados import metadado
 
 
 class StaffInline(admin.TabularInline):
     model = StaffPadrao
     extra = 0
+    autocomplete_fields = ["pessoa"]
 
     def get_formset(self, request, obj, **kwargs):
         fs = super().get_formset(request, obj, **kwargs)
@@ -21,6 +30,7 @@ class StaffPadraoVeiculoAdmin(admin.ModelAdmin):
     list_display = ["veiculo", "capacidade", "staffs", "pessoas_count"]
     fields = ["veiculo", "ultimo_ajuste", "usuario"]
     readonly_fields = ["ultimo_ajuste"]
+    autocomplete_fields = ["usuario"]
     inlines = [StaffInline]
 
     def formfield_for_manytomany(
@@ -32,6 +42,14 @@ class StaffPadraoVeiculoAdmin(admin.ModelAdmin):
             )
         return super().formfield_for_manytomany(db_field, request, **kwargs)
 
+    def get_queryset(self, request: HttpRequest):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("veiculo")
+            .annotate(_pessoas_count=Count("staffpadrao"))
+        )
+
     def capacidade(self, instance):
         return instance.veiculo.capacidade
 
@@ -39,9 +57,9 @@ class StaffPadraoVeiculoAdmin(admin.ModelAdmin):
     def staffs(self, instance):
         return instance.veiculo.qtd_staffs
 
-    @admin.display(description="Staffs registrados")
+    @admin.display(description="Staffs registrados", ordering="_pessoas_count")
     def pessoas_count(self, instance: StaffPadraoVeiculo):
-        return StaffPadrao.objects.filter(staff_padrao_veiculo=instance).count()
+        return instance._pessoas_count
 
 
 class StaffsAdmin(admin.ModelAdmin):
@@ -57,41 +75,56 @@ class StaffsAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request: HttpRequest):
         queryset = (
-            super().get_queryset(request).filter(~Q(tipo=TiposPessoasChoices.CONVIDADO))
+            super()
+            .get_queryset(request)
+            .filter(~Q(tipo=TiposPessoasChoices.CONVIDADO))
+            .select_related("grupo", "staffpadrao__staff_padrao_veiculo__veiculo")
         )
         return queryset
 
     def staff_padrao_veiculo(self, obj: PessoaStaff):
-        if spv := obj.staff_padrao_veiculo:
-            return f"{obj.nome} [{obj.get_tipo_display()} - {spv.veiculo}]"
+        # staffpadrao já vem do select_related do get_queryset
+        try:
+            spv = obj.staffpadrao.staff_padrao_veiculo
+        except StaffPadrao.DoesNotExist:
+            return None
+        return f"{obj.nome} [{obj.get_tipo_display()} - {spv.veiculo}]"
 
     def get_actions(self, request: HttpRequest):
         actions = super().get_actions(request)
-        logger = logging.getLogger("staffs")
-        for spv in StaffPadraoVeiculo.objects.all():
-
-            def add_to_spv(staff: PessoaStaff, request: HttpRequest, queryset):
-                for pessoa in queryset:
-                    if staff_padrao := StaffPadrao.objects.filter(
-                        pessoa=pessoa
-                    ).first():
-                        if staff_padrao.staff_padrao_veiculo == spv:
-                            continue
-                        anterior = staff_padrao.staff_padrao_veiculo
-                        staff_padrao.staff_padrao_veiculo = spv
-                        staff_padrao.save()
-                        logger.info("Alterando %s: %s -> %s", pessoa, anterior, spv)
-
-                    else:
-                        staff_padrao = StaffPadrao.objects.create(
-                            pessoa=pessoa, staff_padrao_veiculo=spv
-                        )
-                        logger.info("Atribuindo %s -> %s", pessoa, spv)
-
-            actions[f"add_spv_{spv.veiculo.id}"] = (
-                add_to_spv,
-                f"add_spv_{spv.veiculo.id}",
-                f"Adicionar a {spv}",
-            )
-
+        actions.update(acoes_staff_padrao_veiculo())
         return actions
+
+
+def _adicionar_a_spv(spv: StaffPadraoVeiculo):
+    def add_to_spv(staff: PessoaStaff, request: HttpRequest, queryset):
+        logger = logging.getLogger("staffs")
+        for pessoa in queryset:
+            if staff_padrao := StaffPadrao.objects.filter(pessoa=pessoa).first():
+                if staff_padrao.staff_padrao_veiculo_id == spv.pk:
+                    continue
+                anterior = staff_padrao.staff_padrao_veiculo
+                staff_padrao.staff_padrao_veiculo = spv
+                staff_padrao.save()
+                logger.info("Alterando %s: %s -> %s", pessoa, anterior, spv)
+
+            else:
+                staff_padrao = StaffPadrao.objects.create(
+                    pessoa=pessoa, staff_padrao_veiculo=spv
+                )
+                logger.info("Atribuindo %s -> %s", pessoa, spv)
+
+    return add_to_spv
+
+
+@metadado(StaffPadraoVeiculo, Veiculo, ttl=timedelta(minutes=5))
+def acoes_staff_padrao_veiculo() -> dict[str, tuple]:
+    """Uma ação "Adicionar a <veículo>" por staff padrão de veículo"""
+    return {
+        f"add_spv_{spv.veiculo_id}": (
+            _adicionar_a_spv(spv),
+            f"add_spv_{spv.veiculo_id}",
+            f"Adicionar a {spv}",
+        )
+        for spv in StaffPadraoVeiculo.objects.select_related("veiculo")
+    }
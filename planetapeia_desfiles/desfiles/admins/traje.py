@@ -1,10 +1,30 @@
 from typing import Any
 from django.contrib import admin
+from django.contrib.admin.filters import RelatedFieldListFilter
 from django.http import HttpRequest
 
 from ..models import TrajeHistorico, TrajeInventario, TrajeMovimentoChoices
 
 
+class TrajeFilter(RelatedFieldListFilter):
+    # Relacionamentos usados no __str__ das opções do filtro
+    select_related = ["veiculo"]
+
+    def field_choices(self, field, request, model_admin):
+        # As mesmas opções de field.get_choices, com o select_related
+        queryset = field.related_model._default_manager.complex_filter(
+            field.get_limit_choices_to()
+        ).select_related(*self.select_related)
+        if ordering := self.field_admin_ordering(field, request, model_admin):
+            queryset = queryset.order_by(*ordering)
+        attname = field.remote_field.get_related_field().attname
+        return [(getattr(obj, attname), str(obj)) for obj in queryset]
+
+
+class TrajeInventarioFilter(TrajeFilter):
+    select_related = ["traje__veiculo"]
+
+
 class TrajeInventarioInline(admin.TabularInline):
     model = TrajeInventario
     show_change_link = True
@@ -21,6 +41,7 @@ class TrajeHistoricoInline(admin.TabularInline):
     model = TrajeHistorico
     extra = 0
     fields = ["data", "movimento", "obs", "usuario", "pessoa"]
+    autocomplete_fields = ["usuario", "pessoa"]
     readonly_fields = ["data"]
     show_change_link = True
 
@@ -43,7 +64,7 @@ class TrajeInventarioAdmin(admin.ModelAdmin):
         "pessoa",
         "ultima_atualizacao",
     ]
-    list_filter = ["situacao", "traje"]
+    list_filter = ["situacao", ("traje", TrajeFilter)]
     fields = [
         "num_inventario",
         "traje",
@@ -56,28 +77,44 @@ class TrajeInventarioAdmin(admin.ModelAdmin):
     readonly_fields = ["situacao", "ultima_atualizacao", "usuario", "pessoa"]
     show_change_link = True
 
+    def get_queryset(self, request: HttpRequest):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("traje__veiculo", "usuario", "pessoa")
+        )
+
     def get_readonly_fields(
         self, request: HttpRequest, obj: Any | None = ...
     ) -> list[str] | tuple[Any, ...]:
         readonly_fields = ["situacao", "ultima_atualizacao", "usuario", "pessoa"]
-        if obj.id:
+        if obj and obj.id:
             readonly_fields.extend(["num_inventario", "traje", "tamanho"])
         return readonly_fields
 
 
 class TrajeHistoricoAdmin(admin.ModelAdmin):
     list_display = ["traje", "data", "get_situacao", "get_checklist"]
-    list_filter = ["traje"]
+    list_filter = [("traje", TrajeInventarioFilter)]
     ordering = ["traje", "data"]
     fields = ["traje", "data", "movimento", "usuario", "pessoa", "checagem", "obs"]
+    autocomplete_fields = ["usuario", "pessoa"]
+
+    def get_queryset(self, request: HttpRequest):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("traje__traje__veiculo", "pessoa")
+            .prefetch_related("checagem")
+        )
 
     def get_readonly_fields(
         self, request: HttpRequest, obj: TrajeHistorico | None = None
     ):
-        readonly_fields = []
-        if obj.pk:
+        readonly_fields = ["data"]
+        if obj and obj.pk:
             readonly_fields.extend(
-                ["movimento", "data", "traje", "pessoa", "checagem", "obs", "usuario"]
+                ["movimento", "traje", "pessoa", "checagem", "obs", "usuario"]
             )
         return readonly_fields
 
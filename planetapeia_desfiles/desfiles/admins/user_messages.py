@@ -7,38 +7,33 @@ from django.contrib.auth.models import User
 from django.db.models.query import QuerySet
 from django.http import HttpRequest
 
-from ..models import UserMessage
 from ..services.date_time_provider import DateTimeProvider
-from ..services.mem_cache import MemCache
+from ..services.user_messages import invalidar_resumo_mensagens
 
 
-class PessoasCache:
-    def __init__(self):
-        self.cache = MemCache()
-
-    def get_nome(self, username: str) -> str:
-        if not (nome := self.cache.get(username)):
-            user = User.objects.get(username=username)
-            nome = user.get_full_name() or user.get_username()
-            self.cache.set(username, nome)
-        return nome
-
-
-pessoas_cache = PessoasCache()
+def nome_usuario(user: User) -> str:
+    return user.get_full_name() or user.get_username()
 
 
 @admin.action(description="Marcar como lidas")
 def marcar_como_lidas(modeladmin, request, queryset):
     queryset.update(read_at=DateTimeProvider.now())
+    invalidar_resumo_mensagens(
+        *queryset.values_list("user_to", flat=True).distinct().order_by()
+    )
 
 
 class PessoaFilter(RelatedFieldListFilter):
-    def choices(self, changelist):
-        for i, choice in enumerate(super().choices(changelist)):
-            if i > 0:
-                pessoa = pessoas_cache.get_nome(choice["display"])
-                choice["display"] = pessoa
-            yield choice
+    def field_choices(self, field, request, model_admin):
+        # Opções de field.get_choices (limit_choices_to e ordenação do admin),
+        # com o nome do usuário no lugar do username
+        queryset = field.related_model._default_manager.complex_filter(
+            field.get_limit_choices_to()
+        )
+        if ordering := self.field_admin_ordering(field, request, model_admin):
+            queryset = queryset.order_by(*ordering)
+        attname = field.remote_field.get_related_field().attname
+        return [(getattr(user, attname), nome_usuario(user)) for user in queryset]
 
 
 class UserMessagesAdmin(admin.ModelAdmin):
@@ -64,18 +59,19 @@ class UserMessagesAdmin(admin.ModelAdmin):
         return list_filter
 
     def get_queryset(self, request: HttpRequest) -> QuerySet[Any]:
+        queryset = super().get_queryset(request)
         if request.pessoa:
-            return UserMessage.objects.filter(user_to=request.user)
-        return super().get_queryset(request)
+            queryset = queryset.filter(user_to=request.user)
+        return queryset.select_related("user_from", "user_to")
 
     @admin.display(description="Remetente")
     def get_remetente(self, obj):
-        return pessoas_cache.get_nome(obj.user_from.username)
+        return nome_usuario(obj.user_from)
 
     @admin.display(description="Destinatário")
     def get_destinatario(self, obj):
-        return pessoas_cache.get_nome(obj.user_to.username)
+        return nome_usuario(obj.user_to)
 
     @admin.display(description="Trânsito")
     def get_transito(self, obj):
-        return f"{pessoas_cache.get_nome(obj.user_from.username)} -> {pessoas_cache.get_nome(obj.user_to.username)}"
+        return f"{nome_usuario(obj.user_from)} -> {nome_usuario(obj.user_to)}"
@@ -0,0 +1,24 @@
+from django.contrib.auth.admin import UserAdmin
+from django.db.models import Q
+
+from ..services.busca_pessoa import buscar_pessoas
+
+
+def _autocomplete(request) -> bool:
+    """Requisição do autocomplete de um campo de usuário em outro admin"""
+    return "app_label" in request.GET and "field_name" in request.GET
+
+
+class UsuarioAdmin(UserAdmin):
+    def get_search_results(self, request, queryset, search_term):
+        """No autocomplete: usuários das pessoas encontradas pela busca indexada de
+        nomes (o username é o CPF) e administradores sem pessoa pelo início do
+        username. Na listagem de usuários, a busca padrão do UserAdmin"""
+        if not _autocomplete(request):
+            return super().get_search_results(request, queryset, search_term)
+        if not (search_term := search_term.strip()):
+            return queryset, False
+        return queryset.filter(
+            Q(username__in=buscar_pessoas(search_term).values("cpf"))
+            | Q(username__startswith=search_term)
+        ), False
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DesfilesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "desfiles"
+
+    def ready(self):
+        from . import signals
+        from .services.busca_pessoa import garantir_indice_busca
+
+        signals.enable()
+
+        post_migrate.connect(garantir_indice_busca, sender=self)
@@ -0,0 +1,121 @@
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from ...models import Pessoa
+from ...services.face_recognition import (
+    LARGURAS_MINIATURA,
+    get_face_file,
+    get_face_images_metrics,
+)
+from ...services.miniaturas import gravar_miniaturas, miniaturas_atualizadas
+
+
+def miniaturas_em_dia(pessoa: Pessoa, arquivo: str) -> bool:
+    """Manifesto da foto atual com todas as miniaturas mais novas que a foto"""
+    if not miniaturas_atualizadas(pessoa):
+        return False
+    mtime = os.path.getmtime(arquivo)
+    for largura in LARGURAS_MINIATURA:
+        face_file = get_face_file(arquivo, largura)
+        if not os.path.isfile(face_file) or os.path.getmtime(face_file) < mtime:
+            return False
+    return True
+
+
+class Command(BaseCommand):
+    help = "Gera as miniaturas de rosto das fotos das pessoas em paralelo"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas lista as fotos que seriam processadas",
+        )
+        parser.add_argument(
+            "--since",
+            type=datetime.date.fromisoformat,
+            help="Apenas fotos modificadas a partir desta data (AAAA-MM-DD)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Processa também as fotos com miniaturas em dia",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Número de processos (padrão: número de CPUs)",
+        )
+
+    def handle(self, *args, **options):
+        since = (
+            datetime.datetime.combine(options["since"], datetime.time()).timestamp()
+            if options["since"]
+            else 0
+        )
+        pendentes = {}
+        ignoradas = 0
+        for pessoa in Pessoa.objects.exclude(foto="").exclude(foto=None).iterator():
+            arquivo = pessoa.foto.path
+            if not os.path.isfile(arquivo):
+                self.stderr.write(f"Foto não encontrada: {pessoa} {arquivo}")
+                continue
+            if os.path.getmtime(arquivo) < since or (
+                not options["force"] and miniaturas_em_dia(pessoa, arquivo)
+            ):
+                ignoradas += 1
+                continue
+            pendentes[pessoa.pk] = (pessoa.foto.name, arquivo)
+
+        self.stdout.write(f"{len(pendentes)} fotos a processar, {ignoradas} em dia")
+        if options["dry_run"]:
+            for _, arquivo in pendentes.values():
+                self.stdout.write(f"  {arquivo}")
+            return
+        if not pendentes:
+            return
+
+        inicio = time.perf_counter()
+        processadas = falhas = 0
+        metricas = []
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = {
+                executor.submit(get_face_images_metrics, arquivo): pessoa_pk
+                for pessoa_pk, (_, arquivo) in pendentes.items()
+            }
+            for future in as_completed(futures):
+                pessoa_pk = futures[future]
+                origem, arquivo = pendentes[pessoa_pk]
+                try:
+                    face_files, metrica = future.result()
+                    gravar_miniaturas(pessoa_pk, origem, face_files)
+                    metricas.append(metrica)
+                    processadas += 1
+                except Exception as exc:
+                    falhas += 1
+                    self.stderr.write(f"Falha em {arquivo}: {exc}")
+
+        tempo = time.perf_counter() - inicio
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{processadas} fotos processadas, {falhas} falhas em {tempo:.1f}s "
+                f"({processadas / tempo if tempo else 0:.1f} fotos/s)"
+            )
+        )
+        if metricas:
+            n = len(metricas)
+            self.stdout.write(
+                "Média por foto: "
+                f"decodificação {sum(m.decode_ms for m in metricas) / n:.0f}ms, "
+                f"detecção {sum(m.detect_ms for m in metricas) / n:.0f}ms, "
+                f"redimensionamento {sum(m.resize_ms for m in metricas) / n:.0f}ms, "
+                f"gravação {sum(m.write_ms for m in metricas) / n:.0f}ms | "
+                f"maior imagem decodificada "
+                f"{max(m.decoded_bytes for m in metricas) / 2**20:.1f}MB | "
+                f"rostos encontrados {sum(m.face_found for m in metricas)}/{n}"
+            )
@@ -1,52 +1,19 @@
-import logging
-
 from django.http.request import HttpRequest
-from django.templatetags.static import static
 
 from ..models import Pessoa
-from ..services.mem_cache import MemCache
-
-
-def get_pessoa_from_request(request: HttpRequest) -> Pessoa | None:
-    pessoa = None
-    try:
-        if request.user.is_active:
-            pessoa = Pessoa.objects.get(pk=request.user.username)
-
-    except Pessoa.DoesNotExist:
-        logging.getLogger(__name__).info(
-            "Pessoa não identificada para o user %s", request.user
-        )
-    finally:
-        logging.getLogger(__name__).info(
-            "REQUEST USER = %s | PESSOA = %s", request.user, pessoa
-        )
-    return pessoa
+from .request_context import RequestContext
 
 
 class PessoaMiddleware:
-    """Injeção do objeto pessoa logada na requisição"""
+    """Injeção do objeto pessoa logada e do contexto da requisição"""
 
     def __init__(self, get_response):
         self.get_response = get_response
-        self.pessoas = MemCache()
-
-    def get_pessoa(self, request: HttpRequest):
-        if not request.user.is_active:
-            return None
-        if pessoa := self.pessoas.get(request.user.pk):
-            return pessoa
-        pessoa = get_pessoa_from_request(request)
-        self.pessoas.set(request.user.pk, pessoa)
-        return pessoa
 
     def __call__(self, request: HttpRequest):
-        request.pessoa: Pessoa = self.get_pessoa(request)
-        request.foto = (
-            request.pessoa.get_foto()
-            if request.pessoa
-            else static("icon_admin_black.svg")
-        )
+        request.contexto = RequestContext(request)
+        request.pessoa: Pessoa = request.contexto.pessoa
+        request.foto = request.contexto.foto
 
         response = self.get_response(request)
 
@@ -0,0 +1,68 @@
+from functools import cached_property
+
+from django.http.request import HttpRequest
+from django.templatetags.static import static
+from django.utils.functional import SimpleLazyObject, empty
+
+from .. import roles
+from ..models import Pessoa
+from ..services.cache import get_cache
+from ..services.pessoa_service import get_pessoa_from_request
+
+
+class RequestContext:
+    """Dados derivados da requisição, calculados uma única vez por requisição.
+    Após alterações (login, permissões, mensagens) use invalidar()"""
+
+    def __init__(self, request: HttpRequest):
+        self.request = request
+
+    @cached_property
+    def pessoa(self) -> Pessoa | None:
+        user = self.request.user
+        if not user.is_active:
+            return None
+        # Chave pelo username (CPF) para invalidação ao salvar a pessoa (signals)
+        cache = get_cache("pessoas")
+        if pessoa := cache.get(user.username):
+            return pessoa
+        pessoa = get_pessoa_from_request(self.request)
+        cache.set(user.username, pessoa)
+        return pessoa
+
+    @cached_property
+    def foto(self) -> str:
+        return self.pessoa.get_foto() if self.pessoa else static("icon_admin_black.svg")
+
+    @cached_property
+    def permissoes(self) -> set[str]:
+        return self.request.user.get_all_permissions()
+
+    def tem_permissao(self, perm: str) -> bool:
+        """Equivalente a user.has_perm, sobre o conjunto de permissões da requisição.
+        Aceita também os papéis de roles, sem o app_label"""
+        user = self.request.user
+        perm = roles.permissao(perm) if perm in roles.roles else perm
+        return user.is_active and (user.is_superuser or perm in self.permissoes)
+
+    @cached_property
+    def navbar(self):
+        from ..views.utils import NavBar
+
+        return NavBar(self.request)
+
+    def invalidar(self, *nomes: str):
+        """Descarta os dados informados (ou todos), recalculados no próximo acesso"""
+        for nome in nomes or ("pessoa", "foto", "permissoes", "navbar"):
+            self.__dict__.pop(nome, None)
+        if not nomes or "pessoa" in nomes or "permissoes" in nomes:
+            # Permissões em cache no objeto user (ModelBackend), e não no SimpleLazyObject
+            user = self.request.user
+            if isinstance(user, SimpleLazyObject):
+                user = user._wrapped
+            if user is not empty:
+                for attr in ("_perm_cache", "_user_perm_cache", "_group_perm_cache"):
+                    vars(user).pop(attr, None)
+        if not nomes or "pessoa" in nomes:
+            self.request.pessoa = self.pessoa
+            self.request.foto = self.foto
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:12
+
+import logging
+
+from django.db import migrations
+
+from desfiles.models_utils import nome_pesquisavel
+
+# DDL congelada nesta migração (não importar de desfiles.services.busca_pessoa)
+INDICE_TRGM = "idx_pessoa_nome_busca_trgm"
+TABELA_FTS = "desfiles_pessoa_trgm"
+
+SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+    "nome_busca, content='desfiles_pessoa', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS}(rowid, nome_busca) VALUES (new.rowid, new.nome_busca); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome_busca) "
+    "VALUES ('delete', old.rowid, old.nome_busca); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS}({TABELA_FTS}, rowid, nome_busca) "
+    "VALUES ('delete', old.rowid, old.nome_busca); "
+    f"INSERT INTO {TABELA_FTS}(rowid, nome_busca) VALUES (new.rowid, new.nome_busca); END",
+    f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES ('rebuild')",
+]
+
+
+def atualizar_nome_busca(apps, schema_editor):
+    Pessoa = apps.get_model("desfiles", "Pessoa")
+    pessoas = []
+    for pessoa in Pessoa.objects.only("cpf", "nome", "nome_busca").iterator():
+        if pessoa.nome_busca != (nome_busca := nome_pesquisavel(pessoa.nome)):
+            pessoa.nome_busca = nome_busca
+            pessoas.append(pessoa)
+    Pessoa.objects.bulk_update(pessoas, ["nome_busca"], batch_size=500)
+
+
+def criar_indice(apps, schema_editor):
+    match schema_editor.connection.vendor:
+        case "postgresql":
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {INDICE_TRGM} "
+                "ON desfiles_pessoa USING gin (nome_busca gin_trgm_ops)"
+            )
+        case "sqlite":
+            try:
+                for sql in SQLITE_FTS:
+                    schema_editor.execute(sql)
+            except Exception as exc:
+                logging.getLogger(__name__).warning(
+                    "SQLite sem suporte a FTS5 trigram, busca sem índice: %s", exc
+                )
+
+
+def remover_indice(apps, schema_editor):
+    match schema_editor.connection.vendor:
+        case "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {INDICE_TRGM}")
+        case "sqlite":
+            for trigger in ("ai", "ad", "au"):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {TABELA_FTS}_{trigger}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {TABELA_FTS}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0041_desfile_valor_taxa_traje"),
+    ]
+
+    operations = [
+        migrations.RunPython(atualizar_nome_busca, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
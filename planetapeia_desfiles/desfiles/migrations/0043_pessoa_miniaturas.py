@@ -0,0 +1,22 @@
+# Generated by Django 5.0.3 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0042_pessoa_nome_busca_indice"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pessoa",
+            name="miniaturas",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                verbose_name="Miniaturas da foto",
+            ),
+        ),
+    ]
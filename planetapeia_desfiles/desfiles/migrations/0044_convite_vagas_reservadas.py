@@ -0,0 +1,43 @@
+# Generated by Django 5.0.3 on 2026-10-18 17:20
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def contar_vagas_reservadas(apps, schema_editor):
+    Convite = apps.get_model("desfiles", "Convite")
+    InscricaoDesfile = apps.get_model("desfiles", "InscricaoDesfile")
+    reservadas = (
+        InscricaoDesfile.objects.filter(convite=OuterRef("pk"))
+        .exclude(aprovacao="R")
+        .order_by()
+        .values("convite")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Convite.objects.update(
+        vagas_reservadas=Coalesce(
+            Subquery(reservadas, output_field=IntegerField()), Value(0)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0043_pessoa_miniaturas"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="convite",
+            name="vagas_reservadas",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                editable=False,
+                help_text="Inscrições não rejeitadas feitas pelo convite",
+                verbose_name="Vagas reservadas",
+            ),
+        ),
+        migrations.RunPython(contar_vagas_reservadas, migrations.RunPython.noop),
+    ]
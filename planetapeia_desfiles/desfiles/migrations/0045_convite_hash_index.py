@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0044_convite_vagas_reservadas"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="convite",
+            name="hash",
+            field=models.CharField(
+                db_index=True,
+                default="",
+                editable=False,
+                max_length=8,
+                verbose_name="Hash",
+            ),
+        ),
+    ]
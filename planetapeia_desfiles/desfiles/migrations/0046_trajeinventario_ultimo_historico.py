@@ -0,0 +1,60 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_ultimo_historico(apps, schema_editor):
+    TrajeInventario = apps.get_model("desfiles", "TrajeInventario")
+    TrajeHistorico = apps.get_model("desfiles", "TrajeHistorico")
+    ultimo = TrajeHistorico.objects.filter(traje=OuterRef("pk")).order_by(
+        "-data", "-pk"
+    )
+    TrajeInventario.objects.update(
+        ultimo_historico=Subquery(ultimo.values("pk")[:1]),
+        ultimo_movimento=Coalesce(Subquery(ultimo.values("movimento")[:1]), Value("")),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0045_convite_hash_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trajeinventario",
+            name="ultimo_historico",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="desfiles.trajehistorico",
+                verbose_name="Último histórico",
+            ),
+        ),
+        migrations.AddField(
+            model_name="trajeinventario",
+            name="ultimo_movimento",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("E", "Entrada"),
+                    ("B", "Empréstimo"),
+                    ("D", "Devolução"),
+                    ("M", "Manutenção"),
+                    ("X", "Descarte"),
+                    ("x", "Extravio"),
+                ],
+                default="",
+                editable=False,
+                max_length=1,
+                verbose_name="Último movimento",
+            ),
+        ),
+        migrations.RunPython(preencher_ultimo_historico, migrations.RunPython.noop),
+    ]
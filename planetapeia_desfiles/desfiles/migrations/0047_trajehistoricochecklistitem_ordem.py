@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0046_trajeinventario_ultimo_historico"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="trajehistoricochecklistitem",
+            options={"ordering": ["ordem", "pk"]},
+        ),
+        migrations.AddField(
+            model_name="trajehistoricochecklistitem",
+            name="ordem",
+            field=models.PositiveSmallIntegerField(default=0, verbose_name="Ordem"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0047_trajehistoricochecklistitem_ordem"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trajeinventario",
+            index=models.Index(
+                fields=["situacao", "tamanho", "traje"], name="idx_inv_disp"
+            ),
+        ),
+    ]
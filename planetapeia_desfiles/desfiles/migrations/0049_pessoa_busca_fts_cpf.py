@@ -0,0 +1,80 @@
+# Generated by Django 5.0.3 on 2026-10-18 14:40
+
+import logging
+
+from django.db import migrations
+
+# DDL congelada nesta migração (não importar de desfiles.services.busca_pessoa)
+
+# Tabela FTS5 da 0042, ligada a desfiles_pessoa pelo rowid
+TABELA_FTS_ROWID = "desfiles_pessoa_trgm"
+# Tabela FTS5 ligada a desfiles_pessoa pelo cpf
+TABELA_FTS = "desfiles_pessoa_busca_fts"
+
+SQLITE_FTS_ROWID = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS_ROWID} USING fts5("
+    "nome_busca, content='desfiles_pessoa', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS_ROWID}_ai AFTER INSERT ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS_ROWID}(rowid, nome_busca) VALUES (new.rowid, new.nome_busca); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS_ROWID}_ad AFTER DELETE ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS_ROWID}({TABELA_FTS_ROWID}, rowid, nome_busca) "
+    "VALUES ('delete', old.rowid, old.nome_busca); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS_ROWID}_au AFTER UPDATE ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS_ROWID}({TABELA_FTS_ROWID}, rowid, nome_busca) "
+    "VALUES ('delete', old.rowid, old.nome_busca); "
+    f"INSERT INTO {TABELA_FTS_ROWID}(rowid, nome_busca) VALUES (new.rowid, new.nome_busca); END",
+    f"INSERT INTO {TABELA_FTS_ROWID}({TABELA_FTS_ROWID}) VALUES ('rebuild')",
+]
+
+SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+    "nome_busca, cpf UNINDEXED, tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS}(nome_busca, cpf) VALUES (new.nome_busca, new.cpf); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON desfiles_pessoa BEGIN "
+    f"DELETE FROM {TABELA_FTS} WHERE cpf = old.cpf; END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE ON desfiles_pessoa "
+    "WHEN old.nome_busca IS NOT new.nome_busca OR old.cpf IS NOT new.cpf BEGIN "
+    f"DELETE FROM {TABELA_FTS} WHERE cpf = old.cpf; "
+    f"INSERT INTO {TABELA_FTS}(nome_busca, cpf) VALUES (new.nome_busca, new.cpf); END",
+    f"DELETE FROM {TABELA_FTS}",
+    f"INSERT INTO {TABELA_FTS}(nome_busca, cpf) SELECT nome_busca, cpf FROM desfiles_pessoa",
+]
+
+
+def remover_tabela(schema_editor, tabela: str):
+    for trigger in ("ai", "ad", "au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {tabela}_{trigger}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {tabela}")
+
+
+def criar_tabela(schema_editor, ddl: list[str]):
+    try:
+        for sql in ddl:
+            schema_editor.execute(sql)
+    except Exception as exc:
+        logging.getLogger(__name__).warning(
+            "SQLite sem suporte a FTS5 trigram, busca sem índice: %s", exc
+        )
+
+
+def recriar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        remover_tabela(schema_editor, TABELA_FTS_ROWID)
+        criar_tabela(schema_editor, SQLITE_FTS)
+
+
+def restaurar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        remover_tabela(schema_editor, TABELA_FTS)
+        criar_tabela(schema_editor, SQLITE_FTS_ROWID)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("desfiles", "0048_trajeinventario_idx_inv_disp"),
+    ]
+
+    operations = [
+        migrations.RunPython(recriar_indice, restaurar_indice),
+    ]
@@ -1,13 +1,12 @@
 import datetime
 import decimal
 import logging
-import os
 import uuid
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.templatetags.static import static
 from django.urls import reverse
 
@@ -22,7 +21,7 @@ from .models_utils import (
     upload_to,
 )
 from .services.date_time_provider import DateTimeProvider
-from .services.face_recognition import get_face_image
+from .services.face_recognition import LARGURA_PADRAO
 
 
 class GenerosChoices(models.TextChoices):
@@ -144,12 +143,32 @@ class Pessoa(models.Model):
         null=True,
         blank=True,
     )
+    miniaturas = models.JSONField(
+        verbose_name="Miniaturas da foto", default=dict, blank=True, editable=False
+    )
 
-    def get_foto(self):
+    def get_foto(self, largura: int = LARGURA_PADRAO):
+        """Miniatura do rosto na largura informada.
+        Enquanto não estiver pronta, é agendada e usa-se o ícone do gênero"""
+        if miniatura := self.get_miniatura(largura):
+            return miniatura
         if self.foto:
-            foto_file = os.path.abspath(f'./{self.foto.url.removeprefix("/")}')
-            url = get_face_image(foto_file)
-            return static(os.path.basename(url))
+            from .services.miniaturas import agendar_miniaturas
+
+            agendar_miniaturas(self)
+        return self.get_icone()
+
+    def get_miniatura(self, largura: int = LARGURA_PADRAO) -> str | None:
+        """Miniatura do rosto na largura informada, se já gerada para a foto atual
+        (consulta apenas o manifesto, sem agendar a geração)"""
+        if (
+            self.foto
+            and self.miniaturas.get("origem") == self.foto.name
+            and (miniatura := self.miniaturas.get(str(largura)))
+        ):
+            return static(miniatura)
+
+    def get_icone(self) -> str:
         return static(
             "icon_male_black.svg"
             if self.genero == GenerosChoices.MASCULINO
@@ -561,6 +580,12 @@ class Traje(models.Model):
         validators=[campos_checklist_validator],
     )
 
+    def get_checklist_itens(self) -> list[str]:
+        """Itens do checklist na ordem cadastrada, sem repetições"""
+        return list(
+            dict.fromkeys(extract_campos_checklist(self.campos_checklist).splitlines())
+        )
+
     def clean(self):
         if not extract_campos_checklist(self.campos_checklist):
             raise ValidationError(
@@ -610,15 +635,29 @@ class TrajeInventario(models.Model):
     ultima_atualizacao: datetime = models.DateTimeField(
         verbose_name="Última atualização", auto_now=True
     )
+    ultimo_historico: "TrajeHistorico" = models.ForeignKey(
+        "TrajeHistorico",
+        verbose_name="Último histórico",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="+",
+    )
+    ultimo_movimento: TrajeMovimentoChoices = models.CharField(
+        verbose_name="Último movimento",
+        max_length=1,
+        choices=TrajeMovimentoChoices,
+        blank=True,
+        default="",
+        editable=False,
+    )
 
     def __str__(self) -> str:
         return f"#{self.num_inventario} {self.traje}"
 
     def get_checklist_itens(self) -> list[str]:
-        traje_checks = set(
-            extract_campos_checklist(self.traje.campos_checklist).splitlines(False)
-        )
-        return list(traje_checks)
+        return self.traje.get_checklist_itens()
 
     def situacao_str(self) -> str:
         """Descrição da situação atual do traje"""
@@ -635,9 +674,10 @@ class TrajeInventario(models.Model):
                 return f"{self} : Descartado"
 
     def save(self, *args, **kwargs) -> None:
-        criar_entrada = not self.id
-        super().save(*args, **kwargs)
-        if criar_entrada:
+        if self.id:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
             TrajeHistorico.objects.create(
                 traje=self,
                 obs="Entrada automática",
@@ -648,10 +688,15 @@ class TrajeInventario(models.Model):
     class Meta:
         verbose_name = "Inventário"
         verbose_name_plural = "Inventários"
+        indexes = [
+            models.Index(fields=["situacao", "tamanho", "traje"], name="idx_inv_disp")
+        ]
 
 
 class TrajeHistorico(models.Model):
     is_cleaned = False
+    # Situação dos itens do checklist ao gravar o histórico (item: checado)
+    checados: dict[str, bool] | None = None
     traje: TrajeInventario = models.ForeignKey(
         TrajeInventario, verbose_name="Traje", on_delete=models.PROTECT
     )
@@ -680,117 +725,82 @@ class TrajeHistorico(models.Model):
         return f"{self.traje}: {self.get_movimento_display()}"
 
     def get_checklist_itens(self) -> list[str]:
-        traje_checks = set(
-            extract_campos_checklist(self.traje.traje.campos_checklist).splitlines(
-                False
+        return self.traje.traje.get_checklist_itens()
+
+    def novos_checks(self, itens: list[str]) -> list["TrajeHistoricoChecklistItem"]:
+        checados = self.checados or {}
+        return [
+            TrajeHistoricoChecklistItem(
+                historico=self,
+                item=item,
+                ordem=ordem,
+                checado=checados.get(item, False),
+            )
+            for ordem, item in enumerate(self.get_checklist_itens())
+            if item in itens
+        ]
+
+    @classmethod
+    def criar_checagens(cls, historicos: list["TrajeHistorico"]):
+        """Cria os itens de checagem de históricos recém-gravados num único
+        bulk_create, e as ligações da checagem num único INSERT"""
+        checks = TrajeHistoricoChecklistItem.objects.bulk_create(
+            check
+            for historico in historicos
+            for check in historico.novos_checks(historico.get_checklist_itens())
+        )
+        cls.checagem.through.objects.bulk_create(
+            cls.checagem.through(
+                trajehistorico_id=check.historico_id,
+                trajehistoricochecklistitem_id=check.pk,
             )
+            for check in checks
         )
-        return list(traje_checks)
 
-    def update_checagem(self):
+    def update_checagem(self, novo: bool = False):
         """Checagem deve ocorrer no momento do emprestimo e na devolução"""
-        if self.movimento in [
+        if self.movimento not in [
             TrajeMovimentoChoices.EMPRESTIMO,
             TrajeMovimentoChoices.DEVOLUCAO,
         ]:
-            traje_checks = set(
-                extract_campos_checklist(self.traje.traje.campos_checklist).splitlines(
-                    False
-                )
-            )
-            # Procura por checks que não existem na lista esperada
-            if checks := self.checagem.filter(~models.Q(item__in=traje_checks)):
-                self.checagem.remove(checks)
-
-            # Procura por checks da lista que não estão na instância
-            checks = set(check.item for check in self.checagem.all())
-            novos_checks = traje_checks.difference(checks)
+            if not novo:
+                # Remover qualquer checagem anterior
+                self.checagem.clear()
+            return
+
+        if novo:
+            TrajeHistorico.criar_checagens([self])
+            return
+
+        traje_checks = self.get_checklist_itens()
+        # Procura por checks que não existem na lista esperada
+        if checks := self.checagem.filter(~models.Q(item__in=traje_checks)):
+            self.checagem.remove(*checks)
+
+        # Aplica a situação informada aos checks existentes
+        if self.checados is not None:
+            for checado in (True, False):
+                if itens := [i for i, c in self.checados.items() if bool(c) == checado]:
+                    self.checagem.filter(item__in=itens).exclude(
+                        checado=checado
+                    ).update(checado=checado)
+
+        # Procura por checks da lista que não estão na instância
+        checks = set(check.item for check in self.checagem.all())
+        if novos_checks := [item for item in traje_checks if item not in checks]:
             self.checagem.add(
-                *[
-                    TrajeHistoricoChecklistItem.objects.create(
-                        historico=self, item=check
-                    )
-                    for check in novos_checks
-                ]
+                *TrajeHistoricoChecklistItem.objects.bulk_create(
+                    self.novos_checks(novos_checks)
+                )
             )
 
-        else:
-            if checks := self.checagem.objects.all():
-                # Remover qualquer checagem anterior
-                self.checagem.remove(checks)
-
     def clean(self):
-        # Verifica a situação do último histórico se for um insert
-        if self.id:
-            ultimo = (
-                TrajeHistorico.objects.filter(traje=self.traje, data__lt=self.data)
-                .order_by("data")
-                .last()
-            )
-        else:
-            ultimo = (
-                TrajeHistorico.objects.filter(traje=self.traje).order_by("data").last()
-            )
+        if not self.pk:
+            # Valida a transição pelo último movimento do inventário, sem consultar o histórico
+            from .services.traje_estados import validar_movimento
 
-        if not ultimo:
-            # O primeiro histórico deve ser uma entrada
-            if self.movimento != TrajeMovimentoChoices.ENTRADA:
-                raise ValidationError(
-                    "O primeiro histórico de um traje no inventário deve ser uma ENTRADA"
-                )
-        else:
-            # O movimento deve ser diferente do movimento anterior
-            if self.movimento == ultimo.movimento:
-                raise ValidationError(
-                    f"O movimento deve ser diferente do anterior: {self.get_movimento_display()}"
-                )
-            # trajes descartados ou extraviados não podem mais ser movimentados
-            if ultimo.movimento in [
-                TrajeMovimentoChoices.DESCARTE,
-                TrajeMovimentoChoices.EXTRAVIO,
-            ]:
-                raise ValidationError(
-                    f"Não é possível gerar movimento de um traje em situação: {ultimo.get_movimento_display()}"
-                )
+            validar_movimento(self.traje.ultimo_movimento, self.movimento)
 
-            allowed = {
-                TrajeMovimentoChoices.ENTRADA: [
-                    TrajeMovimentoChoices.EMPRESTIMO,
-                    TrajeMovimentoChoices.MANUTENCAO,
-                    TrajeMovimentoChoices.DESCARTE,
-                    TrajeMovimentoChoices.EXTRAVIO,
-                ],
-                TrajeMovimentoChoices.EMPRESTIMO: [
-                    TrajeMovimentoChoices.DEVOLUCAO,
-                    TrajeMovimentoChoices.EXTRAVIO,
-                ],
-                TrajeMovimentoChoices.DESCARTE: [],
-                TrajeMovimentoChoices.EXTRAVIO: [],
-                TrajeMovimentoChoices.DEVOLUCAO: [
-                    TrajeMovimentoChoices.EMPRESTIMO,
-                    TrajeMovimentoChoices.MANUTENCAO,
-                    TrajeMovimentoChoices.DESCARTE,
-                    TrajeMovimentoChoices.EXTRAVIO,
-                ],
-                TrajeMovimentoChoices.MANUTENCAO: [
-                    TrajeMovimentoChoices.DEVOLUCAO,
-                    TrajeMovimentoChoices.DESCARTE,
-                    TrajeMovimentoChoices.EXTRAVIO,
-                ],
-            }[ultimo.movimento]
-
-            if self.movimento not in allowed:
-                raise ValidationError(
-                    f"O movimento deve ser uma das opções a seguir: {', '.join(a.label for a in allowed)}"
-                )
-        situacao = {
-            TrajeMovimentoChoices.ENTRADA: SituacaoTrajeChoices.DISPONIVEL,
-            TrajeMovimentoChoices.EMPRESTIMO: SituacaoTrajeChoices.EMPRESTADO,
-            TrajeMovimentoChoices.MANUTENCAO: SituacaoTrajeChoices.MANUTENCAO,
-            TrajeMovimentoChoices.DEVOLUCAO: SituacaoTrajeChoices.DISPONIVEL,
-            TrajeMovimentoChoices.DESCARTE: SituacaoTrajeChoices.DESCARTADO,
-            TrajeMovimentoChoices.EXTRAVIO: SituacaoTrajeChoices.EXTRAVIADO,
-        }
         if (
             self.movimento == TrajeMovimentoChoices.EMPRESTIMO
             and self.traje.traje.genero != self.pessoa.genero
@@ -798,19 +808,22 @@ class TrajeHistorico(models.Model):
             raise ValidationError(
                 f"Este traje só pode ser emprestado para pessoas do gênero {self.traje.traje.get_genero_display()}"
             )
-
-        self.traje.situacao = situacao[self.movimento]
-        self.traje.pessoa = self.pessoa
-        self.traje.usuario = self.usuario
-        self.traje.ultima_atualizacao = self.data
-        self.traje.save()
         self.is_cleaned = True
 
     def save(self, *args, **kwargs) -> None:
         if not self.is_cleaned:
             self.clean()
-        result = super().save(*args, **kwargs)
-        self.update_checagem()
+        if self.pk:
+            result = super().save(*args, **kwargs)
+            self.update_checagem()
+            return result
+
+        from .services.traje_estados import aplicar_movimento
+
+        with transaction.atomic():
+            result = super().save(*args, **kwargs)
+            aplicar_movimento(self)
+            self.update_checagem(novo=True)
         return result
 
     class Meta:
@@ -870,10 +883,14 @@ class TrajeHistoricoChecklistItem(models.Model):
         verbose_name="Item", max_length=40, blank=False, null=False
     )
     checado: bool = models.BooleanField(verbose_name="Checado", default=False)
+    ordem: int = models.PositiveSmallIntegerField(verbose_name="Ordem", default=0)
 
     def __str__(self):
         return f"{self.item}: {'✅' if self.checado else '❌'}"
 
+    class Meta:
+        ordering = ["ordem", "pk"]
+
 
 class Convite(models.Model):
     desfile: Desfile = models.ForeignKey(
@@ -896,11 +913,17 @@ class Convite(models.Model):
         verbose_name="Máximo de convidados", default=20
     )
     hash: str = models.CharField(
-        verbose_name="Hash", max_length=8, editable=False, default=""
+        verbose_name="Hash", max_length=8, editable=False, default="", db_index=True
     )
     convidados_confirmados: int = models.PositiveSmallIntegerField(
         verbose_name="Confirmados", default=0
     )
+    vagas_reservadas: int = models.PositiveSmallIntegerField(
+        verbose_name="Vagas reservadas",
+        default=0,
+        editable=False,
+        help_text="Inscrições não rejeitadas feitas pelo convite",
+    )
 
     def save(self, *args, **kwargs) -> None:
         if self.valido_ate == datetime.date.min:
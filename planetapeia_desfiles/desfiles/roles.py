@@ -17,3 +17,8 @@ roles = {
 }
 
 pessoa_roles = [(key, desc[1]) for key, desc in roles.items()]
+
+
+def permissao(role: str) -> str:
+    """Nome da permissão do papel para user.has_perm"""
+    return f"desfiles.{role}"
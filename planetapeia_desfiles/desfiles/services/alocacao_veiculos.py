@@ -0,0 +1,270 @@
+"""Alocação das inscrições de um desfile nos seus veículos
+
+Respeita as restrições de Veiculo (capacidade, staffs, crianças, mulheres, homens,
+peso total e individual) e procura manter os integrantes de um mesmo grupo juntos.
+Staffs e condutores ocupam as vagas de staff; convidados, as demais vagas.
+"""
+
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from ..models import (
+    AprovacaoChoices,
+    Desfile,
+    GenerosChoices,
+    InscricaoDesfile,
+    TiposPessoasChoices,
+    Veiculo,
+    VeiculoDesfile,
+)
+from .planejamento_trajes import invalidar_planejamento_trajes
+
+
+@dataclass
+class Perfil:
+    """Ocupação de uma inscrição ou de um conjunto de inscrições"""
+
+    staffs: int = 0
+    participantes: int = 0
+    criancas: int = 0
+    mulheres: int = 0
+    homens: int = 0
+    peso: int = 0
+    peso_max: int = 0
+
+    @classmethod
+    def de(cls, inscricao: InscricaoDesfile) -> "Perfil":
+        pessoa = inscricao.pessoa
+        staff = inscricao.tipo_pessoa != TiposPessoasChoices.CONVIDADO
+        return cls(
+            staffs=int(staff),
+            participantes=int(not staff),
+            criancas=int(not staff and pessoa.e_crianca),
+            mulheres=int(pessoa.genero == GenerosChoices.FEMININO),
+            homens=int(pessoa.genero == GenerosChoices.MASCULINO),
+            peso=pessoa.peso,
+            peso_max=pessoa.peso,
+        )
+
+    def __add__(self, other: "Perfil") -> "Perfil":
+        return Perfil(
+            self.staffs + other.staffs,
+            self.participantes + other.participantes,
+            self.criancas + other.criancas,
+            self.mulheres + other.mulheres,
+            self.homens + other.homens,
+            self.peso + other.peso,
+            max(self.peso_max, other.peso_max),
+        )
+
+
+@dataclass
+class Ocupacao:
+    """Ocupação planejada de um veículo do desfile"""
+
+    veiculo: Veiculo
+    veiculo_desfile: VeiculoDesfile | None = field(default=None)
+    perfil: Perfil = field(default_factory=Perfil)
+    inscricoes: list[InscricaoDesfile] = field(default_factory=list)
+
+    @property
+    def vagas(self) -> int:
+        """Vagas restantes para convidados"""
+        return (
+            self.veiculo.capacidade
+            - self.veiculo.qtd_staffs
+            - self.perfil.participantes
+        )
+
+    def motivo_recusa(self, perfil: Perfil) -> str | None:
+        """Restrição do veículo violada ao incluir o perfil, ou None se couber"""
+        # Sem criar um Perfil somado: chamado para cada inscrição x veículo
+        veiculo, atual = self.veiculo, self.perfil
+        if atual.staffs + perfil.staffs > veiculo.qtd_staffs:
+            return "sem vaga de staff"
+        if (
+            atual.participantes + perfil.participantes
+            > veiculo.capacidade - veiculo.qtd_staffs
+        ):
+            return "capacidade esgotada"
+        if atual.criancas + perfil.criancas > veiculo.qtd_max_criancas:
+            return "limite de crianças"
+        if atual.mulheres + perfil.mulheres > veiculo.qtd_max_mulheres:
+            return "limite de mulheres"
+        if atual.homens + perfil.homens > veiculo.qtd_max_homens:
+            return "limite de homens"
+        if (
+            veiculo.peso_individual_max
+            and perfil.peso_max > veiculo.peso_individual_max
+        ):
+            return "peso individual acima do máximo"
+        if veiculo.peso_total_max and atual.peso + perfil.peso > veiculo.peso_total_max:
+            return "peso total acima do máximo"
+        return None
+
+    def incluir(self, inscricao: InscricaoDesfile, perfil: Perfil):
+        self.inscricoes.append(inscricao)
+        self.perfil = self.perfil + perfil
+
+
+@dataclass
+class Violacao:
+    inscricao: InscricaoDesfile
+    motivo: str
+
+    def __str__(self) -> str:
+        return f"{self.inscricao.pessoa}: {self.motivo}"
+
+
+@dataclass
+class PlanoAlocacao:
+    desfile: Desfile
+    ocupacoes: list[Ocupacao] = field(default_factory=list)
+    alocacoes: dict[int, Ocupacao] = field(default_factory=dict)
+    violacoes: list[Violacao] = field(default_factory=list)
+    grupos_divididos: dict[int, int] = field(default_factory=dict)
+    tempo_ms: float = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.alocacoes)} inscrições alocadas em {len(self.ocupacoes)} veículos, "
+            f"{len(self.violacoes)} sem alocação, "
+            f"{len(self.grupos_divididos)} grupos divididos ({self.tempo_ms:.0f}ms)"
+        )
+
+
+def planejar_alocacao(desfile: Desfile, manter_alocacoes: bool = True) -> PlanoAlocacao:
+    """Planeja a alocação das inscrições pendentes e aprovadas do desfile nos veículos.
+    Com manter_alocacoes, as inscrições já alocadas permanecem no veículo, se couberem.
+    O plano não é gravado: veja aplicar_plano"""
+    inicio = time.perf_counter()
+    plano = PlanoAlocacao(desfile)
+
+    veiculos_desfile = {
+        vd.veiculo_id: vd
+        for vd in VeiculoDesfile.objects.filter(desfile=desfile)
+        .select_related("veiculo")
+        .order_by("-pk")
+    }
+    veiculos = {vd.veiculo_id: vd.veiculo for vd in veiculos_desfile.values()}
+    veiculos.update((veiculo.pk, veiculo) for veiculo in desfile.veiculos.all())
+    plano.ocupacoes = [
+        Ocupacao(veiculo, veiculos_desfile.get(veiculo.pk))
+        for veiculo in sorted(veiculos.values(), key=lambda v: v.pk)
+    ]
+    indices_veiculo_desfile = {
+        ocupacao.veiculo_desfile.pk: i
+        for i, ocupacao in enumerate(plano.ocupacoes)
+        if ocupacao.veiculo_desfile
+    }
+
+    inscricoes = (
+        InscricaoDesfile.objects.filter(desfile=desfile)
+        .exclude(aprovacao=AprovacaoChoices.REJEITADO)
+        .select_related("pessoa")
+        .order_by("pk")
+    )
+    grupos: dict[int, list[tuple[InscricaoDesfile, Perfil]]] = defaultdict(list)
+    veiculos_grupo: dict[int, set[int]] = defaultdict(set)
+
+    def alocar(inscricao: InscricaoDesfile, perfil: Perfil, indice: int, grupo: int):
+        plano.ocupacoes[indice].incluir(inscricao, perfil)
+        plano.alocacoes[inscricao.pk] = plano.ocupacoes[indice]
+        veiculos_grupo[grupo].add(indice)
+
+    for inscricao in inscricoes:
+        perfil = Perfil.de(inscricao)
+        grupo = inscricao.grupo_id or inscricao.pessoa.grupo_id
+        indice = indices_veiculo_desfile.get(inscricao.veiculo_id)
+        if (
+            manter_alocacoes
+            and indice is not None
+            and not plano.ocupacoes[indice].motivo_recusa(perfil)
+        ):
+            alocar(inscricao, perfil, indice, grupo)
+        else:
+            grupos[grupo].append((inscricao, perfil))
+
+    # Maiores grupos primeiro; staffs antes dos convidados; mais pesados antes
+    for grupo, membros in sorted(grupos.items(), key=lambda g: -len(g[1])):
+        membros.sort(key=lambda m: (-m[1].staffs, -m[1].peso))
+        total = sum((perfil for _, perfil in membros), Perfil())
+
+        # Grupo inteiro no veículo com menos vagas sobrando (best fit)
+        candidatos = [
+            i
+            for i, ocupacao in enumerate(plano.ocupacoes)
+            if not ocupacao.motivo_recusa(total)
+        ]
+        if candidatos:
+            indice = min(
+                candidatos,
+                key=lambda i: (
+                    i not in veiculos_grupo[grupo],
+                    plano.ocupacoes[i].vagas,
+                ),
+            )
+            for inscricao, perfil in membros:
+                alocar(inscricao, perfil, indice, grupo)
+            continue
+
+        # Divide o grupo, preferindo os veículos onde ele já está
+        for inscricao, perfil in membros:
+            motivos = set()
+            melhor = None
+            for i, ocupacao in enumerate(plano.ocupacoes):
+                if motivo := ocupacao.motivo_recusa(perfil):
+                    motivos.add(motivo)
+                    continue
+                chave = (i not in veiculos_grupo[grupo], ocupacao.vagas)
+                if melhor is None or chave < melhor[0]:
+                    melhor = (chave, i)
+            if melhor:
+                alocar(inscricao, perfil, melhor[1], grupo)
+            else:
+                plano.violacoes.append(
+                    Violacao(
+                        inscricao,
+                        ", ".join(sorted(motivos)) or "desfile sem veículos",
+                    )
+                )
+
+    plano.grupos_divididos = {
+        grupo: len(indices)
+        for grupo, indices in veiculos_grupo.items()
+        if len(indices) > 1
+    }
+    plano.tempo_ms = (time.perf_counter() - inicio) * 1000
+    return plano
+
+
+@transaction.atomic
+def aplicar_plano(plano: PlanoAlocacao) -> int:
+    """Grava os veículos planejados nas inscrições, retornando o número de alterações.
+    Inscrições sem alocação no plano não são alteradas"""
+    novos = [
+        ocupacao
+        for ocupacao in plano.ocupacoes
+        if ocupacao.inscricoes and not ocupacao.veiculo_desfile
+    ]
+    for ocupacao, veiculo_desfile in zip(
+        novos,
+        VeiculoDesfile.objects.bulk_create(
+            VeiculoDesfile(desfile=plano.desfile, veiculo=ocupacao.veiculo)
+            for ocupacao in novos
+        ),
+    ):
+        ocupacao.veiculo_desfile = veiculo_desfile
+
+    alteradas = []
+    for ocupacao in plano.ocupacoes:
+        for inscricao in ocupacao.inscricoes:
+            if inscricao.veiculo_id != ocupacao.veiculo_desfile.pk:
+                inscricao.veiculo = ocupacao.veiculo_desfile
+                alteradas.append(inscricao)
+    InscricaoDesfile.objects.bulk_update(alteradas, ["veiculo"], batch_size=500)
+    invalidar_planejamento_trajes()
+    return len(alteradas)
@@ -0,0 +1,121 @@
+"""Busca indexada de pessoas pelo campo nome_busca
+
+Postgres: índice GIN com pg_trgm (gin_trgm_ops), usado pelos filtros por
+substring (LIKE '%termo%') e ordenação pela similaridade de trigramas.
+
+SQLite: tabela virtual FTS5 com tokenizador trigram e o cpf (UNINDEXED) de cada
+linha, mantida por triggers sobre desfiles_pessoa. A ligação é pelo cpf e não pelo
+rowid implícito de desfiles_pessoa (chave primária CHAR), que o VACUUM pode
+renumerar. Na falta do FTS5 a busca usa apenas o LIKE.
+"""
+
+import functools
+import logging
+
+from django.db import connections
+from django.db.models import Case, IntegerField, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+
+from ..models import Pessoa
+from ..models_utils import nome_pesquisavel
+
+TABELA_FTS = "desfiles_pessoa_busca_fts"
+
+_SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_FTS} USING fts5("
+    "nome_busca, cpf UNINDEXED, tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ai AFTER INSERT ON desfiles_pessoa BEGIN "
+    f"INSERT INTO {TABELA_FTS}(nome_busca, cpf) VALUES (new.nome_busca, new.cpf); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_ad AFTER DELETE ON desfiles_pessoa BEGIN "
+    f"DELETE FROM {TABELA_FTS} WHERE cpf = old.cpf; END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA_FTS}_au AFTER UPDATE ON desfiles_pessoa "
+    "WHEN old.nome_busca IS NOT new.nome_busca OR old.cpf IS NOT new.cpf BEGIN "
+    f"DELETE FROM {TABELA_FTS} WHERE cpf = old.cpf; "
+    f"INSERT INTO {TABELA_FTS}(nome_busca, cpf) VALUES (new.nome_busca, new.cpf); END",
+    # Repopula a partir de desfiles_pessoa (alterações feitas sem as triggers)
+    f"DELETE FROM {TABELA_FTS}",
+    f"INSERT INTO {TABELA_FTS}(nome_busca, cpf) SELECT nome_busca, cpf FROM desfiles_pessoa",
+]
+
+
+def criar_indice_busca(schema_editor):
+    """Cria (ou recria) a tabela FTS5 e as triggers no SQLite e a repopula.
+    A criação inicial, e o índice do Postgres, ficam nas migrações 0042 e 0049"""
+    try:
+        for sql in _SQLITE_FTS:
+            schema_editor.execute(sql)
+    except Exception as exc:
+        logging.getLogger(__name__).warning(
+            "SQLite sem suporte a FTS5 trigram, busca sem índice: %s", exc
+        )
+    _fts_disponivel.cache_clear()
+
+
+def garantir_indice_busca(using: str = "default", **kwargs):
+    """Recria as triggers do FTS5 no SQLite após as migrações e repopula a tabela.
+    Alterações de schema no SQLite recriam a tabela desfiles_pessoa e descartam as triggers.
+    """
+    connection = connections[using]
+    _fts_disponivel.cache_clear()
+    if connection.vendor != "sqlite" or not _fts_disponivel(using):
+        return
+    with connection.schema_editor() as schema_editor:
+        criar_indice_busca(schema_editor)
+
+
+@functools.cache
+def _fts_disponivel(using: str) -> bool:
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [TABELA_FTS]
+        )
+        return cursor.fetchone() is not None
+
+
+def buscar_pessoas(termo: str, queryset: QuerySet | None = None) -> QuerySet:
+    """Pessoas cujo nome contém todas as palavras do termo, ordenadas por relevância:
+    nome iniciado pelo termo, palavra iniciada pelo termo e similaridade"""
+    queryset = Pessoa.objects.all() if queryset is None else queryset
+    if not (termo := nome_pesquisavel(termo)):
+        return queryset.none()
+    palavras = termo.split(" ")
+    connection = connections[queryset.db]
+
+    if connection.vendor == "sqlite" and _fts_disponivel(queryset.db):
+        # O tokenizador trigram só localiza substrings com 3 ou mais caracteres.
+        # Cada palavra é uma string FTS5, com as aspas internas duplicadas
+        if match := " ".join(
+            '"{}"'.format(p.replace('"', '""')) for p in palavras if len(p) >= 3
+        ):
+            queryset = queryset.filter(
+                pk__in=RawSQL(
+                    f"SELECT cpf FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s",
+                    [match],
+                )
+            )
+        palavras = [p for p in palavras if len(p) < 3]
+
+    # nome_busca já está normalizado em minúsculas: contains (LIKE) usa o índice trigram
+    for palavra in palavras:
+        queryset = queryset.filter(nome_busca__contains=palavra)
+
+    queryset = queryset.annotate(
+        relevancia=Case(
+            When(nome_busca__startswith=termo, then=Value(2)),
+            When(nome_busca__contains=f" {termo}", then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset = queryset.annotate(
+            similaridade=TrigramSimilarity("nome_busca", termo)
+        ).order_by("-relevancia", "-similaridade", "nome_busca", "pk")
+    else:
+        queryset = queryset.annotate(tamanho=Length("nome_busca")).order_by(
+            "-relevancia", "tamanho", "nome_busca", "pk"
+        )
+    return queryset
@@ -0,0 +1,170 @@
+"""Caches nomeados da aplicação
+
+O backend é escolhido em settings.DESFILES_CACHE_BACKEND:
+- memory: MemCache, em memória de cada processo
+- django: framework de cache do Django (settings.CACHES), compartilhado entre os workers
+- sqlite: arquivo SQLite local (settings.DESFILES_CACHE_SQLITE_PATH), compartilhado entre os workers
+"""
+
+import pickle
+import sqlite3
+import threading
+from datetime import timedelta
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .mem_cache import CacheStats, MemCache
+
+_MISSING = object()
+
+
+class DjangoCache:
+    """Cache sobre o framework de cache do Django, com prefixo por nome.
+    As chaves incluem a versão do nome: clear() incrementa a versão e as chaves
+    anteriores deixam de ser lidas, expirando pelo TTL"""
+
+    def __init__(
+        self,
+        name: str,
+        default_ttl: timedelta = timedelta(seconds=30),
+        alias: str = "default",
+    ):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.cache = caches[alias]
+        self.stats = CacheStats()
+
+    @property
+    def _versao_key(self) -> str:
+        return f"desfiles:{self.name}:versao"
+
+    def _key(self, key) -> str:
+        versao = self.cache.get_or_set(self._versao_key, 1, None)
+        return f"desfiles:{self.name}:{versao}:{key}"
+
+    def set(self, key, value, ttl: timedelta | None = None):
+        self.cache.set(self._key(key), value, (ttl or self.default_ttl).total_seconds())
+
+    def get(self, key, default_value=None):
+        if (value := self.cache.get(self._key(key), _MISSING)) is _MISSING:
+            self.stats.misses += 1
+            return default_value
+        self.stats.hits += 1
+        return value
+
+    def delete(self, key):
+        self.cache.delete(self._key(key))
+
+    def clear(self):
+        self.cache.add(self._versao_key, 1, None)
+        self.cache.incr(self._versao_key)
+
+
+class SQLiteCache:
+    """Cache em arquivo SQLite local, com expiração (TTL) e descarte LRU
+    ao atingir max_size itens por nome"""
+
+    def __init__(
+        self,
+        name: str,
+        default_ttl: timedelta = timedelta(seconds=30),
+        max_size: int = 1000,
+        path: str = "",
+    ):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self.path = path or settings.DESFILES_CACHE_SQLITE_PATH
+        self.stats = CacheStats()
+        self.local = threading.local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if not (connection := getattr(self.local, "connection", None)):
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (name TEXT, key TEXT, value BLOB, "
+                "expires REAL, accessed REAL, PRIMARY KEY (name, key))"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (name, accessed)"
+            )
+            self.local.connection = connection
+        return connection
+
+    def set(self, key, value, ttl: timedelta | None = None):
+        now = time()
+        expires = now + (ttl or self.default_ttl).total_seconds()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+            (self.name, str(key), pickle.dumps(value), expires, now),
+        )
+        excess = self.connection.execute(
+            "SELECT COUNT(*) - ? FROM cache WHERE name = ?", (self.max_size, self.name)
+        ).fetchone()[0]
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM cache WHERE name = ? AND key IN "
+                "(SELECT key FROM cache WHERE name = ? ORDER BY accessed LIMIT ?)",
+                (self.name, self.name, excess),
+            )
+            self.stats.evictions += excess
+
+    def get(self, key, default_value=None):
+        now = time()
+        row = self.connection.execute(
+            "SELECT value, expires FROM cache WHERE name = ? AND key = ?",
+            (self.name, str(key)),
+        ).fetchone()
+        if row and row[1] > now:
+            self.connection.execute(
+                "UPDATE cache SET accessed = ? WHERE name = ? AND key = ?",
+                (now, self.name, str(key)),
+            )
+            self.stats.hits += 1
+            return pickle.loads(row[0])
+        if row:
+            self.delete(key)
+            self.stats.evictions += 1
+        self.stats.misses += 1
+        return default_value
+
+    def delete(self, key):
+        self.connection.execute(
+            "DELETE FROM cache WHERE name = ? AND key = ?", (self.name, str(key))
+        )
+
+    def clear(self):
+        self.connection.execute("DELETE FROM cache WHERE name = ?", (self.name,))
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_cache(
+    name: str,
+    default_ttl: timedelta = timedelta(seconds=30),
+    max_size: int = 1000,
+) -> MemCache | DjangoCache | SQLiteCache:
+    """Obtém o cache nomeado do processo, criando-o no backend configurado"""
+    with _lock:
+        if cache := _caches.get(name):
+            return cache
+        match settings.DESFILES_CACHE_BACKEND:
+            case "django":
+                cache = DjangoCache(name, default_ttl)
+            case "sqlite":
+                cache = SQLiteCache(name, default_ttl, max_size)
+            case _:
+                cache = MemCache(default_ttl, max_size)
+        _caches[name] = cache
+        return cache
+
+
+def get_caches_stats() -> dict[str, CacheStats]:
+    """Contadores de acertos, falhas e descartes de cada cache do processo"""
+    return {name: cache.stats for name, cache in _caches.items()}
@@ -1,6 +1,25 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Iterable
+
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 
-from ..models import AprovacaoChoices, InscricaoDesfile, Pessoa, SituacaoDesfileChoices
+from ..models import (
+    AprovacaoChoices,
+    Convite,
+    Desfile,
+    InscricaoDesfile,
+    Pessoa,
+    SituacaoDesfileChoices,
+)
+from .cache import get_cache
+from .date_time_provider import DateTimeProvider
+from .planejamento_trajes import invalidar_planejamento_trajes
 
 
 def validar_pessoa_convidada(pessoa: Pessoa) -> InscricaoDesfile:
@@ -8,7 +27,7 @@ def validar_pessoa_convidada(pessoa: Pessoa) -> InscricaoDesfile:
     if not (
         inscricoes := InscricaoDesfile.objects.filter(
             pessoa=pessoa, desfile__situacao=SituacaoDesfileChoices.CONFIRMADO
-        ).all()
+        ).select_related("pessoa", "desfile", "veiculo__veiculo")
     ):
         raise ValidationError(f"{pessoa} não tem inscrição para desfile confirmado")
 
@@ -19,3 +38,155 @@ def validar_pessoa_convidada(pessoa: Pessoa) -> InscricaoDesfile:
     raise ValidationError(
         f'{pessoa} tem inscrição não aprovada para desfile(s): {", ".join(str(inscricao.desfile) for inscricao in inscricoes)}'
     )
+
+
+def _convites_cache():
+    return get_cache("convites", default_ttl=timedelta(minutes=5))
+
+
+def obter_convite(hash: str) -> Convite | None:
+    """Convite (com o desfile) pelo hash, em cache até a alteração do convite,
+    do desfile ou das vagas. Não altere o objeto retornado"""
+    if not (convite := _convites_cache().get(hash)):
+        if convite := (
+            Convite.objects.select_related("desfile").filter(hash=hash).first()
+        ):
+            _convites_cache().set(hash, convite)
+    return convite
+
+
+def invalidar_convites(*hashes: str):
+    """Descarta os convites em cache após o commit da transação atual"""
+
+    def invalidar():
+        for hash in hashes:
+            _convites_cache().delete(hash)
+
+    transaction.on_commit(invalidar)
+
+
+def _contagem_inscricoes(inscricoes):
+    """Subquery com o número de inscrições de cada convite (OuterRef)"""
+    return Coalesce(
+        Subquery(
+            inscricoes.filter(convite=OuterRef("pk"))
+            .order_by()
+            .values("convite")
+            .annotate(count=Count("pk"))
+            .values("count"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def recontar_convidados(convite_ids: Iterable[int]) -> int:
+    """Recalcula Convite.convidados_confirmados (inscrições aprovadas) e
+    Convite.vagas_reservadas (não rejeitadas) dos convites informados num único UPDATE"""
+    if not (convite_ids := set(convite_ids) - {None}):
+        return 0
+    convites = Convite.objects.filter(pk__in=convite_ids)
+    invalidar_convites(*convites.values_list("hash", flat=True))
+    return convites.update(
+        convidados_confirmados=_contagem_inscricoes(
+            InscricaoDesfile.objects.filter(aprovacao=AprovacaoChoices.APROVADO)
+        ),
+        vagas_reservadas=_contagem_inscricoes(
+            InscricaoDesfile.objects.exclude(aprovacao=AprovacaoChoices.REJEITADO)
+        ),
+    )
+
+
+def inscrever_por_convite(
+    convite: Convite, pessoa: Pessoa, **kwargs
+) -> InscricaoDesfile:
+    """Inscreve a pessoa no desfile do convite, reservando uma vaga atomicamente.
+    A reserva é um UPDATE condicional (que bloqueia a linha do convite) e é desfeita
+    junto com a transação se a inscrição falhar"""
+    with transaction.atomic():
+        if not Convite.objects.filter(
+            pk=convite.pk, vagas_reservadas__lt=F("max_convidados")
+        ).update(vagas_reservadas=F("vagas_reservadas") + 1):
+            raise ValidationError(
+                f"O limite de {convite.max_convidados} pessoas para este convite já foi atingido"
+            )
+        inscricao = InscricaoDesfile(
+            desfile=convite.desfile, pessoa=pessoa, convite=convite, **kwargs
+        )
+        inscricao._vaga_reservada = True
+        inscricao.save()
+        invalidar_convites(convite.hash)
+    convite.vagas_reservadas += 1
+    return inscricao
+
+
+@dataclass
+class ResultadoAprovacao:
+    aprovadas: list[InscricaoDesfile] = field(default_factory=list)
+    sem_veiculo: list[InscricaoDesfile] = field(default_factory=list)
+    ja_aprovadas: list[InscricaoDesfile] = field(default_factory=list)
+    rejeitadas_por_outros: dict[User, list[InscricaoDesfile]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+
+
+@transaction.atomic
+def aprovar_inscricoes(
+    inscricoes: Iterable[int], aprovador: User
+) -> ResultadoAprovacao:
+    """Aprova as inscrições informadas (pks) com um UPDATE por situação.
+    - pendentes: aprovadas pelo aprovador
+    - rejeitadas pelo próprio aprovador: reaprovadas
+    - rejeitadas por outro administrador: não alteradas, para verificação
+    - sem veículo: não alteradas (a inscrição aprovada exige veículo)
+    Convidados confirmados são recontados uma vez por convite afetado"""
+    resultado = ResultadoAprovacao()
+    pendentes, reaprovadas = [], []
+    for inscricao in (
+        InscricaoDesfile.objects.filter(pk__in=list(inscricoes))
+        .select_related("pessoa", "desfile", "aprovador")
+        .select_for_update(of=("self",))
+        .order_by("pk")
+    ):
+        if inscricao.aprovacao == AprovacaoChoices.APROVADO:
+            resultado.ja_aprovadas.append(inscricao)
+        elif (
+            inscricao.aprovacao == AprovacaoChoices.REJEITADO
+            and inscricao.aprovador != aprovador
+        ):
+            resultado.rejeitadas_por_outros[inscricao.aprovador].append(inscricao)
+        elif not inscricao.veiculo_id:
+            resultado.sem_veiculo.append(inscricao)
+        elif inscricao.aprovacao == AprovacaoChoices.PENDENTE:
+            pendentes.append(inscricao)
+        else:
+            reaprovadas.append(inscricao)
+
+    agora = DateTimeProvider.now()
+    data_desfile = Subquery(
+        Desfile.objects.filter(pk=OuterRef("desfile_id")).values("data")[:1]
+    )
+    if pendentes:
+        InscricaoDesfile.objects.filter(pk__in=[i.pk for i in pendentes]).update(
+            aprovacao=AprovacaoChoices.APROVADO,
+            aprovador=aprovador,
+            data_aprovacao=agora,
+            data_desfile=data_desfile,
+        )
+    if reaprovadas:
+        InscricaoDesfile.objects.filter(pk__in=[i.pk for i in reaprovadas]).update(
+            aprovacao=AprovacaoChoices.APROVADO,
+            data_aprovacao=agora,
+            data_desfile=data_desfile,
+        )
+    for inscricao in pendentes + reaprovadas:
+        inscricao.aprovacao = AprovacaoChoices.APROVADO
+        inscricao.aprovador = aprovador
+        inscricao.data_aprovacao = agora
+        inscricao.data_desfile = inscricao.desfile.data
+        resultado.aprovadas.append(inscricao)
+
+    recontar_convidados(inscricao.convite_id for inscricao in resultado.aprovadas)
+    if resultado.aprovadas:
+        invalidar_planejamento_trajes()
+    return resultado
@@ -1,3 +1,19 @@
-__all__ = ["get_face_image"]
+__all__ = [
+    "FaceMetrics",
+    "LARGURA_PADRAO",
+    "LARGURAS_MINIATURA",
+    "get_face_file",
+    "get_face_image",
+    "get_face_images",
+    "get_face_images_metrics",
+]
 
-from .face_recognition import get_face_image
+from .face_recognition import (
+    FaceMetrics,
+    LARGURA_PADRAO,
+    LARGURAS_MINIATURA,
+    get_face_file,
+    get_face_image,
+    get_face_images,
+    get_face_images_metrics,
+)
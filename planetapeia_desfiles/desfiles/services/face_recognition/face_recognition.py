@@ -1,34 +1,143 @@
+import logging
 import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
 
 import cv2
+from PIL import Image
 
 CASCADE = os.path.join(os.path.dirname(__file__), "Face_cascade.xml")
-FACE_CASCADE = cv2.CascadeClassifier(CASCADE)
 
+LARGURA_PADRAO = 250
+# Navbar (32px @2x), listagem do admin e perfil
+LARGURAS_MINIATURA = (64, 128, LARGURA_PADRAO)
 
-def get_face_image(filename: str, width=250) -> str:
+# Menor lado mínimo da imagem decodificada: o rosto recortado ainda
+# precisa de resolução para a maior miniatura
+LADO_MINIMO_DECODIFICADO = 1000
+# Maior lado da imagem usada na detecção do rosto
+LADO_DETECCAO = 480
+
+_REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+_local = threading.local()
+
+
+@dataclass
+class FaceMetrics:
+    """Tempos (ms) e dimensões do processamento de uma foto"""
+
+    original_size: tuple[int, int] = field(default=(0, 0))
+    decoded_size: tuple[int, int] = field(default=(0, 0))
+    decoded_bytes: int = 0
+    face_found: bool = False
+    decode_ms: float = 0
+    detect_ms: float = 0
+    resize_ms: float = 0
+    write_ms: float = 0
+
+    @property
+    def total_ms(self) -> float:
+        return self.decode_ms + self.detect_ms + self.resize_ms + self.write_ms
+
+
+def _face_cascade() -> cv2.CascadeClassifier:
+    # CascadeClassifier não é thread-safe: uma instância carregada por thread
+    if not (cascade := getattr(_local, "cascade", None)):
+        cascade = _local.cascade = cv2.CascadeClassifier(CASCADE)
+    return cascade
+
+
+def _read_image(filename: str, metrics: FaceMetrics):
+    """Decodifica a imagem na menor redução (1/2, 1/4, 1/8) que preserve
+    LADO_MINIMO_DECODIFICADO, sem alocar a imagem em tamanho original (JPEG)"""
+    with Image.open(filename) as img:
+        metrics.original_size = img.size
+    menor_lado = min(metrics.original_size)
+    for reduction, flag in _REDUCED_FLAGS.items():
+        if menor_lado // reduction >= LADO_MINIMO_DECODIFICADO:
+            return cv2.imread(filename, flag)
+    return cv2.imread(filename)
+
+
+def get_face_file(filename: str, width=LARGURA_PADRAO) -> str:
+    """Nome do arquivo da miniatura do rosto na largura informada"""
     f, e = os.path.splitext(filename)
-    face_file = f"{f}.face{e}"
-    if os.path.isfile(face_file):
-        return face_file
-    image = cv2.imread(filename)
-    image_grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if width == LARGURA_PADRAO:
+        return f"{f}.face{e}"
+    return f"{f}.face{width}{e}"
+
+
+def get_face_images_metrics(
+    filename: str, widths: Iterable[int] = LARGURAS_MINIATURA
+) -> tuple[dict[int, str], FaceMetrics]:
+    """Gera as miniaturas do rosto nas larguras informadas, retornando as métricas.
+    A detecção roda numa cópia reduzida da imagem e o recorte é mapeado de volta"""
+    metrics = FaceMetrics()
 
-    faces = FACE_CASCADE.detectMultiScale(
-        image_grey, scaleFactor=1.16, minNeighbors=5, minSize=(25, 25), flags=0
+    start = time.perf_counter()
+    image = _read_image(filename, metrics)
+    if image is None:
+        raise ValueError(f"Imagem inválida: {filename}")
+    height, width = image.shape[:2]
+    metrics.decoded_size = (width, height)
+    metrics.decoded_bytes = image.nbytes
+    metrics.decode_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    scale = min(1.0, LADO_DETECCAO / max(width, height))
+    proxy = cv2.resize(
+        image,
+        (int(width * scale), int(height * scale)),
+        interpolation=cv2.INTER_AREA,
+    )
+    proxy = cv2.cvtColor(proxy, cv2.COLOR_BGR2GRAY)
+    faces = _face_cascade().detectMultiScale(
+        proxy, scaleFactor=1.16, minNeighbors=5, minSize=(25, 25), flags=0
     )
     for x, y, w, h in faces:
+        x, y, w, h = (int(v / scale) for v in (x, y, w, h))
         pad = int(h * 0.2)  # 10
-        sub_img = image[max(0, y - pad) : y + h + pad, x - pad : x + w + pad]
+        # Fatia (view) da imagem decodificada, sem cópia
+        sub_img = image[max(0, y - pad) : y + h + pad, max(0, x - pad) : x + w + pad]
+        metrics.face_found = True
 
         break
     else:
         sub_img = image
+    metrics.detect_ms = (time.perf_counter() - start) * 1000
+
+    face_files = {}
+    for width in widths:
+        start = time.perf_counter()
+        r = float(width) / sub_img.shape[1]
+        dim = (width, int(sub_img.shape[0] * r))
+        resized = cv2.resize(sub_img, dim, interpolation=cv2.INTER_AREA)
+        metrics.resize_ms += (time.perf_counter() - start) * 1000
 
-    r = float(width) / sub_img.shape[1]
-    dim = (width, int(sub_img.shape[0] * r))
-    resized = cv2.resize(sub_img, dim, interpolation=cv2.INTER_AREA)
+        start = time.perf_counter()
+        face_files[width] = get_face_file(filename, width)
+        cv2.imwrite(face_files[width], resized)
+        metrics.write_ms += (time.perf_counter() - start) * 1000
 
-    cv2.imwrite(face_file, resized)
+    logging.getLogger(__name__).debug("%s: %s", filename, metrics)
+    return face_files, metrics
 
-    return face_file
+
+def get_face_images(
+    filename: str, widths: Iterable[int] = LARGURAS_MINIATURA
+) -> dict[int, str]:
+    """Gera as miniaturas do rosto nas larguras informadas, detectando o rosto uma única vez"""
+    return get_face_images_metrics(filename, widths)[0]
+
+
+def get_face_image(filename: str, width=LARGURA_PADRAO) -> str:
+    face_file = get_face_file(filename, width)
+    if os.path.isfile(face_file):
+        return face_file
+    return get_face_images(filename, [width])[width]
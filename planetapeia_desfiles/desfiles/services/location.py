@@ -1,12 +1,20 @@
+import functools
 import inspect
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from datetime import timedelta
 
 import httpx
+from django.conf import settings
+from django.core.cache import caches
 from django.http.request import HttpRequest
+from django.utils.module_loading import import_string
 
 from ..models import Pessoa, PessoaLocalizacao
+from .cache import get_cache
 
 _external_ip = (0, "")
 
@@ -32,7 +40,7 @@ class IPLocation:
             "LOCALHOST"
             if self.status == "localhost"
             else "DESCONHECIDO"
-            if self.status == "unknown"
+            if self.status in ("unknown", "fail")
             else f"{self.country} | {self.region} | {self.city}"
         )
 
@@ -52,6 +60,139 @@ class IPLocation:
         )
 
 
+class IPApiBackend:
+    """Consulta de localização pela API pública do ip-api.com"""
+
+    url = "http://ip-api.com/json/{ip}"
+
+    def __init__(self, timeout: float = 5.0):
+        self.client = httpx.Client(
+            timeout=timeout, limits=httpx.Limits(max_connections=4)
+        )
+
+    def lookup(self, ip: str) -> IPLocation | None:
+        response = self.client.get(self.url.format(ip=ip))
+        if response.status_code < 300 and (data := response.json()):
+            if data.get("status") == "success":
+                return IPLocation.from_dict(data)
+        return None
+
+
+class GeoIP2Backend:
+    """Consulta de localização em uma base local MaxMind GeoLite2/GeoIP2 City
+    (settings.LOCATION_GEOIP_DATABASE), sem acesso à rede"""
+
+    def __init__(self, database: str | None = None):
+        try:
+            import geoip2.database
+        except ImportError as exc:
+            raise ImportError("GeoIP2Backend depende do pacote geoip2") from exc
+        self.reader = geoip2.database.Reader(
+            database or settings.LOCATION_GEOIP_DATABASE
+        )
+
+    def lookup(self, ip: str) -> IPLocation | None:
+        from geoip2.errors import AddressNotFoundError
+
+        try:
+            city = self.reader.city(ip)
+        except (AddressNotFoundError, ValueError):
+            return None
+        region = city.subdivisions.most_specific
+        return IPLocation(
+            status="success",
+            country=city.country.name or "",
+            countryCode=city.country.iso_code or "",
+            region=region.iso_code or "",
+            regionName=region.name or "",
+            city=city.city.name or "",
+            zip=city.postal.code or "",
+            lat=city.location.latitude or 0,
+            lon=city.location.longitude or 0,
+            timezone=city.location.time_zone or "",
+            query=ip,
+        )
+
+
+class LocalBackend:
+    """Localização fixa, sem acesso à rede. Para testes e desenvolvimento"""
+
+    def lookup(self, ip: str) -> IPLocation | None:
+        return IPLocation(
+            status="success", country="Local", region="LO", city="Local", query=ip
+        )
+
+
+class LocationResolver:
+    """Resolve a localização dos IPs em segundo plano.
+    O resultado fica no cache compartilhado entre os workers, inclusive as falhas
+    (cache negativo) para não repetir consultas a IPs sem localização"""
+
+    def __init__(
+        self,
+        backend,
+        cache_alias: str = "default",
+        ttl: timedelta = timedelta(hours=24),
+        ttl_falha: timedelta = timedelta(minutes=10),
+        max_workers: int = 2,
+    ):
+        self.backend = backend
+        self.cache = caches[cache_alias]
+        self.ttl = ttl
+        self.ttl_falha = ttl_falha
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="location"
+        )
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def cache_key(ip: str) -> str:
+        return f"location:ip:{ip}"
+
+    def get(self, ip: str) -> IPLocation:
+        """Localização em cache do IP, ou IPLocation() enquanto a consulta é feita"""
+        if not ip:
+            return IPLocation()
+        if location := self.cache.get(self.cache_key(ip)):
+            return location
+        with self.lock:
+            if ip in self.pending:
+                return IPLocation()
+            self.pending.add(ip)
+        self.executor.submit(self.resolve, ip)
+        return IPLocation()
+
+    def resolve(self, ip: str) -> IPLocation:
+        try:
+            location = self.backend.lookup(ip)
+        except Exception as exc:
+            self.log.warning("Falha ao obter localização de %s: %s", ip, exc)
+            location = None
+        finally:
+            with self.lock:
+                self.pending.discard(ip)
+
+        if location:
+            self.cache.set(self.cache_key(ip), location, self.ttl.total_seconds())
+        else:
+            location = IPLocation(status="fail", query=ip)
+            self.cache.set(self.cache_key(ip), location, self.ttl_falha.total_seconds())
+        return location
+
+
+@functools.cache
+def get_location_resolver() -> LocationResolver:
+    """LocationResolver do processo, configurado por settings.LOCATION_BACKEND"""
+    return LocationResolver(
+        import_string(settings.LOCATION_BACKEND)(),
+        cache_alias=settings.LOCATION_CACHE,
+        ttl=timedelta(seconds=settings.LOCATION_CACHE_TTL),
+        ttl_falha=timedelta(seconds=settings.LOCATION_CACHE_TTL_FALHA),
+    )
+
+
 def get_external_ip():
     global _external_ip
     if _external_ip[0] < time.time() - 300:
@@ -76,23 +217,40 @@ def get_ip_from_request(request: HttpRequest) -> str:
     return ip
 
 
+def _ultimas_localizacoes():
+    """Última localização registrada por pessoa.
+    A expiração força uma nova verificação no banco a cada LOCATION_UPDATE_INTERVAL
+    """
+    return get_cache(
+        "localizacoes",
+        default_ttl=timedelta(seconds=settings.LOCATION_UPDATE_INTERVAL),
+        max_size=10000,
+    )
+
+
 def update_location_pessoa(pessoa: Pessoa, location: IPLocation):
-    """Atualiza a localização da pessoa, retornando True se houve mudança"""
+    """Atualiza a localização da pessoa, retornando True se houve mudança.
+    O banco só é consultado quando a localização muda ou o intervalo expira"""
     if not pessoa:
         return False
-    if (
-        last_location := PessoaLocalizacao.objects.filter(pessoa=pessoa)
+    atual = location.to_model(pessoa)
+    del atual["pessoa"]
+    ultimas = _ultimas_localizacoes()
+    if ultimas.get(pessoa.pk) == atual:
+        return False
+
+    # Consulta pelo índice idx_loc (pessoa, when)
+    if last_location := (
+        PessoaLocalizacao.objects.filter(pessoa=pessoa)
         .order_by("-when")
-        .last()
+        .values(*atual.keys())
+        .first()
     ):
-        if (
-            last_location.ip == location.query
-            and last_location.pais == location.country
-            and last_location.estado == (location.region or location.regionName)
-            and last_location.cidade == location.city
-        ):
+        if last_location == atual:
+            ultimas.set(pessoa.pk, atual)
             return False
-    _ = PessoaLocalizacao.objects.create(**location.to_model(pessoa))
+    _ = PessoaLocalizacao.objects.create(pessoa=pessoa, **atual)
+    ultimas.set(pessoa.pk, atual)
 
     logging.getLogger(__name__).info(f"Nova localização para {pessoa} -> {location}")
     return True
@@ -1,19 +1,61 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import timedelta
 from time import time
 
 
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
 class MemCache:
-    def __init__(self, default_ttl: timedelta = timedelta(seconds=30)):
+    """Cache em memória do processo, com expiração (TTL) e descarte LRU
+    ao atingir max_size itens"""
+
+    def __init__(
+        self, default_ttl: timedelta = timedelta(seconds=30), max_size: int = 1000
+    ):
         self.default_ttl = default_ttl
-        self.items = {}
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
 
-    def set(self, key, value):
-        self.items[key] = (value, time() + self.default_ttl.total_seconds())
+    def set(self, key, value, ttl: timedelta | None = None):
+        expires = time() + (ttl or self.default_ttl).total_seconds()
+        with self.lock:
+            self.items[key] = (value, expires)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_size:
+                self.items.popitem(last=False)
+                self.stats.evictions += 1
 
     def get(self, key, default_value=None):
-        if value := self.items.get(key):
-            if value[1] > time():
-                return value[0]
-            del self.items[key]
+        with self.lock:
+            if value := self.items.get(key):
+                if value[1] > time():
+                    self.items.move_to_end(key)
+                    self.stats.hits += 1
+                    return value[0]
+                del self.items[key]
+                self.stats.evictions += 1
+            self.stats.misses += 1
 
         return default_value
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
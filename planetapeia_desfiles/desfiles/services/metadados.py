@@ -0,0 +1,72 @@
+"""Metadados derivados do banco (content types, ações do admin, etc)
+
+Calculados no primeiro uso, e não na importação do módulo, e mantidos em memória
+no processo até o post_save/post_delete de um dos modelos de origem ou o fim do TTL.
+O TTL limita o tempo em que os outros processos ficam desatualizados.
+"""
+
+import threading
+from datetime import timedelta
+from time import time
+from typing import Callable, Generic, TypeVar
+
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+
+T = TypeVar("T")
+
+_VAZIO = object()
+
+
+class Metadado(Generic[T]):
+    def __init__(self, fabrica: Callable[[], T], ttl: timedelta | None = None):
+        self.fabrica = fabrica
+        self.ttl = ttl
+        self._valor = _VAZIO
+        self._expira = 0.0
+        # Incrementada a cada invalidação: o valor calculado durante uma
+        # invalidação não é guardado
+        self._geracao = 0
+        self._lock = threading.Lock()
+        self._lock_geracao = threading.Lock()
+
+    def _expirado(self) -> bool:
+        return bool(self.ttl) and self._expira < time()
+
+    def __call__(self) -> T:
+        if (valor := self._valor) is _VAZIO or self._expirado():
+            with self._lock:
+                if (valor := self._valor) is _VAZIO or self._expirado():
+                    geracao = self._geracao
+                    valor = self.fabrica()
+                    with self._lock_geracao:
+                        if geracao == self._geracao:
+                            self._valor = valor
+                            if self.ttl:
+                                self._expira = time() + self.ttl.total_seconds()
+        return valor
+
+    def invalidar(self, *args, **kwargs):
+        """Descarta o valor calculado. Recebe os argumentos dos signals"""
+        with self._lock_geracao:
+            self._geracao += 1
+            self._valor = _VAZIO
+
+
+def metadado(*modelos: type[models.Model], ttl: timedelta | None = None):
+    """Decorator que torna a função um Metadado, invalidado ao salvar ou excluir
+    instâncias dos modelos informados"""
+
+    def decorator(fabrica: Callable[[], T]) -> Metadado[T]:
+        valor = Metadado(fabrica, ttl)
+        for modelo in modelos:
+            uid = f"metadado:{fabrica.__module__}.{fabrica.__qualname__}:{modelo.__name__}"
+            post_save.connect(
+                valor.invalidar, sender=modelo, weak=False, dispatch_uid=uid
+            )
+            post_delete.connect(
+                valor.invalidar, sender=modelo, weak=False, dispatch_uid=uid
+            )
+        return valor
+
+    return decorator
@@ -0,0 +1,78 @@
+"""Miniaturas do rosto das fotos de pessoas, geradas fora do ciclo da requisição
+
+O manifesto Pessoa.miniaturas guarda a foto de origem e o arquivo de cada largura:
+{"origem": "uploads/Pessoa_1.jpg", "64": "Pessoa_1.face64.jpg", "250": "Pessoa_1.face.jpg"}
+"""
+
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..models import Pessoa
+from .cache import get_cache
+from .face_recognition import get_face_images
+
+_pendentes: set[str] = set()
+_lock = threading.Lock()
+
+
+@functools.cache
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=settings.MINIATURAS_WORKERS, thread_name_prefix="miniaturas"
+    )
+
+
+def miniaturas_atualizadas(pessoa: Pessoa) -> bool:
+    """O manifesto de miniaturas corresponde à foto atual da pessoa"""
+    return bool(pessoa.foto) and pessoa.miniaturas.get("origem") == pessoa.foto.name
+
+
+def agendar_miniaturas(pessoa: Pessoa) -> bool:
+    """Agenda a geração das miniaturas da pessoa, se necessária.
+    Retorna True se a geração foi agendada"""
+    if not pessoa.foto or miniaturas_atualizadas(pessoa):
+        return False
+    with _lock:
+        # Fila limitada: fora dela a miniatura é pedida de novo no próximo acesso
+        if pessoa.pk in _pendentes or len(_pendentes) >= settings.MINIATURAS_FILA:
+            return False
+        _pendentes.add(pessoa.pk)
+    _executor().submit(_gerar_miniaturas, pessoa.pk, pessoa.foto.name, pessoa.foto.path)
+    return True
+
+
+def _gerar_miniaturas(pessoa_pk: str, origem: str, arquivo: str):
+    try:
+        gerar_miniaturas(pessoa_pk, origem, arquivo)
+    except Exception as exc:
+        logging.getLogger(__name__).warning(
+            "Falha ao gerar miniaturas de %s: %s", arquivo, exc
+        )
+    finally:
+        with _lock:
+            _pendentes.discard(pessoa_pk)
+        close_old_connections()
+
+
+def gerar_miniaturas(pessoa_pk: str, origem: str, arquivo: str) -> dict:
+    """Gera as miniaturas da foto e grava o manifesto da pessoa"""
+    return gravar_miniaturas(pessoa_pk, origem, get_face_images(arquivo))
+
+
+def gravar_miniaturas(pessoa_pk: str, origem: str, face_files: dict[int, str]) -> dict:
+    """Grava o manifesto com as miniaturas geradas para a foto de origem"""
+    miniaturas = {"origem": origem} | {
+        str(largura): os.path.basename(face_file)
+        for largura, face_file in face_files.items()
+    }
+    # Não sobrescreve o manifesto se a foto foi trocada durante o processamento
+    if Pessoa.objects.filter(pk=pessoa_pk, foto=origem).update(miniaturas=miniaturas):
+        get_cache("pessoas").delete(pessoa_pk)
+    logging.getLogger(__name__).info("Miniaturas de %s: %s", pessoa_pk, miniaturas)
+    return miniaturas
@@ -1,8 +1,17 @@
 import logging
+from dataclasses import dataclass, field
+from typing import Iterable
 
 from django.http.request import HttpRequest
 
-from ..models import Pessoa
+from ..models import (
+    AprovacaoChoices,
+    InscricaoDesfile,
+    Pessoa,
+    Traje,
+    TrajeInventario,
+)
+from .date_time_provider import DateTimeProvider
 
 
 def get_pessoa_from_request(request: HttpRequest) -> Pessoa | None:
@@ -25,3 +34,62 @@ def get_pessoa_from_request(request: HttpRequest) -> Pessoa | None:
 def get_pessoa(cpf: str) -> Pessoa | None:
     """Obtém uma pessoa a partir do CPF"""
     return Pessoa.objects.filter(pk=str(cpf)).first()
+
+
+@dataclass
+class SituacaoPessoa:
+    """Traje em posse, inscrição aprovada e traje esperado de uma pessoa"""
+
+    pessoa: Pessoa
+    traje_inventario: TrajeInventario | None = field(default=None)
+    inscricao: InscricaoDesfile | None = field(default=None)
+    traje: Traje | None = field(default=None)
+
+
+def obter_situacao_pessoas(pessoas: Iterable[Pessoa]) -> list[SituacaoPessoa]:
+    """Obtém a situação de uma lista de pessoas com um número constante de consultas,
+    independente do tamanho da lista"""
+    situacoes = {pessoa.pk: SituacaoPessoa(pessoa) for pessoa in pessoas}
+    if not situacoes:
+        return []
+
+    for traje_inventario in (
+        TrajeInventario.objects.filter(pessoa__in=situacoes.keys())
+        .select_related("traje__veiculo")
+        .order_by("pk")
+    ):
+        situacao = situacoes[traje_inventario.pessoa_id]
+        if not situacao.traje_inventario:
+            situacao.traje_inventario = traje_inventario
+
+    for inscricao in (
+        InscricaoDesfile.objects.filter(
+            pessoa__in=situacoes.keys(),
+            data_desfile__gte=DateTimeProvider.today(),
+            aprovacao=AprovacaoChoices.APROVADO,
+        )
+        .select_related("pessoa", "desfile", "aprovador", "veiculo__veiculo")
+        .order_by("pk")
+    ):
+        situacao = situacoes[inscricao.pessoa_id]
+        if not situacao.inscricao:
+            situacao.inscricao = inscricao
+
+    veiculos = {
+        situacao.inscricao.veiculo.veiculo_id
+        for situacao in situacoes.values()
+        if situacao.inscricao and situacao.inscricao.veiculo
+    }
+    trajes = {}
+    for traje in (
+        Traje.objects.filter(veiculo__in=veiculos)
+        .select_related("veiculo")
+        .order_by("pk")
+    ):
+        trajes.setdefault(traje.veiculo_id, traje)
+
+    for situacao in situacoes.values():
+        if situacao.inscricao and situacao.inscricao.veiculo:
+            situacao.traje = trajes.get(situacao.inscricao.veiculo.veiculo_id)
+
+    return list(situacoes.values())
@@ -0,0 +1,161 @@
+"""Planejamento de trajes de um desfile: demanda x oferta
+
+A demanda são as inscrições aprovadas, por veículo, gênero e tamanho de traje da
+pessoa, sem as pessoas que já estão com um traje emprestado. A oferta são os
+inventários disponíveis dos trajes dos veículos do desfile.
+O planejamento fica em cache até o próximo movimento de traje ou aprovação.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+
+from ..models import (
+    AprovacaoChoices,
+    Desfile,
+    GenerosChoices,
+    InscricaoDesfile,
+    SituacaoTrajeChoices,
+    TamanhosTrajeChoices,
+    TrajeInventario,
+    VeiculoDesfile,
+)
+from .cache import get_cache
+
+
+def _cache():
+    return get_cache("planejamento_trajes", default_ttl=timedelta(hours=1))
+
+
+def invalidar_planejamento_trajes():
+    """Descarta os planejamentos em cache de todos os desfiles após o commit"""
+    transaction.on_commit(lambda: _cache().set("versao", uuid.uuid4().hex))
+
+
+@dataclass
+class LinhaPlanejamento:
+    veiculo_id: int
+    veiculo: str
+    genero: GenerosChoices
+    tamanho: TamanhosTrajeChoices
+    demanda: int = 0
+    oferta: int = 0
+
+    @property
+    def saldo(self) -> int:
+        return self.oferta - self.demanda
+
+    @property
+    def falta(self) -> int:
+        return max(0, -self.saldo)
+
+    @property
+    def sobra(self) -> int:
+        return max(0, self.saldo)
+
+    def get_genero_display(self) -> str:
+        return GenerosChoices(self.genero).label
+
+    def get_tamanho_display(self) -> str:
+        return TamanhosTrajeChoices(self.tamanho).label
+
+
+@dataclass
+class PlanejamentoTrajes:
+    desfile: Desfile
+    linhas: list[LinhaPlanejamento] = field(default_factory=list)
+
+    @property
+    def demanda(self) -> int:
+        return sum(linha.demanda for linha in self.linhas)
+
+    @property
+    def oferta(self) -> int:
+        return sum(linha.oferta for linha in self.linhas)
+
+    @property
+    def falta(self) -> int:
+        return sum(linha.falta for linha in self.linhas)
+
+    @property
+    def faltas(self) -> list[LinhaPlanejamento]:
+        return [linha for linha in self.linhas if linha.falta]
+
+
+def planejar_trajes(desfile: Desfile) -> PlanejamentoTrajes:
+    """Demanda e oferta de trajes do desfile, com uma consulta agregada para cada lado"""
+    versao = _cache().get("versao", "")
+    key = f"{desfile.pk}:{versao}"
+    if planejamento := _cache().get(key):
+        return planejamento
+
+    linhas: dict[tuple, LinhaPlanejamento] = {}
+
+    def linha(veiculo_id: int, veiculo: str, genero: str, tamanho: str):
+        if not (item := linhas.get((veiculo_id, genero, tamanho))):
+            item = linhas[(veiculo_id, genero, tamanho)] = LinhaPlanejamento(
+                veiculo_id, veiculo, genero, tamanho
+            )
+        return item
+
+    for demanda in (
+        InscricaoDesfile.objects.filter(
+            desfile=desfile,
+            aprovacao=AprovacaoChoices.APROVADO,
+            veiculo__isnull=False,
+        )
+        .exclude(
+            # Exists: um NOT IN com pessoa nula na subquery excluiria todas as linhas
+            Exists(
+                TrajeInventario.objects.filter(
+                    situacao=SituacaoTrajeChoices.EMPRESTADO, pessoa=OuterRef("pessoa")
+                )
+            )
+        )
+        .values(
+            "veiculo__veiculo",
+            "veiculo__veiculo__nome",
+            "pessoa__genero",
+            "pessoa__tamanho_traje",
+        )
+        .annotate(quantidade=Count("pk"))
+        .order_by()
+    ):
+        linha(
+            demanda["veiculo__veiculo"],
+            demanda["veiculo__veiculo__nome"],
+            demanda["pessoa__genero"],
+            demanda["pessoa__tamanho_traje"],
+        ).demanda = demanda["quantidade"]
+
+    for oferta in (
+        TrajeInventario.objects.filter(
+            situacao=SituacaoTrajeChoices.DISPONIVEL,
+            traje__veiculo__in=VeiculoDesfile.objects.filter(desfile=desfile).values(
+                "veiculo"
+            ),
+        )
+        .values("traje__veiculo", "traje__veiculo__nome", "traje__genero", "tamanho")
+        .annotate(quantidade=Count("pk"))
+        .order_by()
+    ):
+        linha(
+            oferta["traje__veiculo"],
+            oferta["traje__veiculo__nome"],
+            oferta["traje__genero"],
+            oferta["tamanho"],
+        ).oferta = oferta["quantidade"]
+
+    tamanhos = {tamanho: ordem for ordem, tamanho in enumerate(TamanhosTrajeChoices)}
+    planejamento = PlanejamentoTrajes(
+        desfile,
+        sorted(
+            linhas.values(),
+            key=lambda item: (item.veiculo, item.genero, tamanhos.get(item.tamanho, 0)),
+        ),
+    )
+    _cache().set(key, planejamento)
+    return planejamento
@@ -0,0 +1,141 @@
+"""Máquina de estados do inventário de trajes
+
+As transições partem do último movimento do traje, mantido em
+TrajeInventario.ultimo_movimento junto com o ponteiro ultimo_historico.
+Validar um movimento não consulta o histórico, e aplicá-lo é um INSERT do
+TrajeHistorico mais um UPDATE condicional do inventário.
+"""
+
+from django.core.exceptions import ValidationError
+
+from ..models import (
+    SituacaoTrajeChoices,
+    TrajeHistorico,
+    TrajeInventario,
+    TrajeMovimentoChoices,
+)
+from .planejamento_trajes import invalidar_planejamento_trajes
+
+# Movimentos permitidos a partir do último movimento ("" = traje sem histórico)
+TRANSICOES: dict[str, frozenset[TrajeMovimentoChoices]] = {
+    "": frozenset([TrajeMovimentoChoices.ENTRADA]),
+    TrajeMovimentoChoices.ENTRADA: frozenset(
+        [
+            TrajeMovimentoChoices.EMPRESTIMO,
+            TrajeMovimentoChoices.MANUTENCAO,
+            TrajeMovimentoChoices.DESCARTE,
+            TrajeMovimentoChoices.EXTRAVIO,
+        ]
+    ),
+    TrajeMovimentoChoices.EMPRESTIMO: frozenset(
+        [
+            TrajeMovimentoChoices.DEVOLUCAO,
+            TrajeMovimentoChoices.EXTRAVIO,
+        ]
+    ),
+    TrajeMovimentoChoices.DEVOLUCAO: frozenset(
+        [
+            TrajeMovimentoChoices.EMPRESTIMO,
+            TrajeMovimentoChoices.MANUTENCAO,
+            TrajeMovimentoChoices.DESCARTE,
+            TrajeMovimentoChoices.EXTRAVIO,
+        ]
+    ),
+    TrajeMovimentoChoices.MANUTENCAO: frozenset(
+        [
+            TrajeMovimentoChoices.DEVOLUCAO,
+            TrajeMovimentoChoices.DESCARTE,
+            TrajeMovimentoChoices.EXTRAVIO,
+        ]
+    ),
+    TrajeMovimentoChoices.DESCARTE: frozenset(),
+    TrajeMovimentoChoices.EXTRAVIO: frozenset(),
+}
+
+# Situação do traje após cada movimento
+SITUACOES: dict[TrajeMovimentoChoices, SituacaoTrajeChoices] = {
+    TrajeMovimentoChoices.ENTRADA: SituacaoTrajeChoices.DISPONIVEL,
+    TrajeMovimentoChoices.EMPRESTIMO: SituacaoTrajeChoices.EMPRESTADO,
+    TrajeMovimentoChoices.MANUTENCAO: SituacaoTrajeChoices.MANUTENCAO,
+    TrajeMovimentoChoices.DEVOLUCAO: SituacaoTrajeChoices.DISPONIVEL,
+    TrajeMovimentoChoices.DESCARTE: SituacaoTrajeChoices.DESCARTADO,
+    TrajeMovimentoChoices.EXTRAVIO: SituacaoTrajeChoices.EXTRAVIADO,
+}
+
+
+def validar_movimento(ultimo_movimento: str, movimento: str):
+    """Verifica se o movimento é permitido após o último movimento do traje"""
+    if not ultimo_movimento:
+        if movimento != TrajeMovimentoChoices.ENTRADA:
+            raise ValidationError(
+                "O primeiro histórico de um traje no inventário deve ser uma ENTRADA"
+            )
+        return
+
+    if movimento in (permitidos := TRANSICOES[ultimo_movimento]):
+        return
+
+    anterior = TrajeMovimentoChoices(ultimo_movimento)
+    if not permitidos:
+        # trajes descartados ou extraviados não podem mais ser movimentados
+        raise ValidationError(
+            f"Não é possível gerar movimento de um traje em situação: {anterior.label}"
+        )
+    if movimento == ultimo_movimento:
+        raise ValidationError(
+            f"O movimento deve ser diferente do anterior: {anterior.label}"
+        )
+    raise ValidationError(
+        "O movimento deve ser uma das opções a seguir: "
+        + ", ".join(m.label for m in TrajeMovimentoChoices if m in permitidos)
+    )
+
+
+def _estado_apos(historico: TrajeHistorico) -> dict:
+    """Campos do inventário após o movimento do histórico"""
+    return {
+        "situacao": SITUACOES[historico.movimento],
+        "pessoa": historico.pessoa,
+        "usuario": historico.usuario,
+        "ultimo_historico": historico,
+        "ultimo_movimento": historico.movimento,
+        "ultima_atualizacao": historico.data,
+    }
+
+
+def aplicar_movimento(historico: TrajeHistorico):
+    """Atualiza o inventário com o movimento recém-gravado do histórico.
+    O UPDATE só ocorre se o traje não foi movimentado desde a validação;
+    caso contrário a transação do histórico deve ser desfeita"""
+    inventario: TrajeInventario = historico.traje
+    estado = _estado_apos(historico)
+    if not TrajeInventario.objects.filter(
+        pk=inventario.pk, ultimo_historico=inventario.ultimo_historico_id
+    ).update(**estado):
+        raise ValidationError(
+            f"{inventario} foi movimentado por outro usuário. Tente novamente"
+        )
+    for campo, valor in estado.items():
+        setattr(inventario, campo, valor)
+    invalidar_planejamento_trajes()
+
+
+def aplicar_movimentos(historicos: list[TrajeHistorico]):
+    """Atualiza num único bulk_update os inventários dos movimentos já gravados.
+    Os inventários devem ter sido bloqueados (select_for_update) antes da validação"""
+    for historico in historicos:
+        for campo, valor in _estado_apos(historico).items():
+            setattr(historico.traje, campo, valor)
+    TrajeInventario.objects.bulk_update(
+        [historico.traje for historico in historicos],
+        [
+            "situacao",
+            "pessoa",
+            "usuario",
+            "ultimo_historico",
+            "ultimo_movimento",
+            "ultima_atualizacao",
+        ],
+        batch_size=500,
+    )
+    invalidar_planejamento_trajes()
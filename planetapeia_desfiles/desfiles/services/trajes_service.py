@@ -1,7 +1,9 @@
+from dataclasses import dataclass, field
 from typing import List, Tuple
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.http.request import HttpRequest
 
 from ..models import (
@@ -21,6 +23,7 @@ from ..models import (
 from ..services.date_time_provider import DateTimeProvider
 from ..utils.genero import parse_genero
 from .pessoa_service import get_pessoa
+from .traje_estados import aplicar_movimentos, validar_movimento
 
 
 def validar_entrega_traje(
@@ -82,15 +85,15 @@ def entregar_traje(
             f"Traje {traje_inventario} indisponível para entrega: {traje_inventario.situacao_str()}"
         )
 
-    historico = TrajeHistorico.objects.create(
+    historico = TrajeHistorico(
         traje=traje_inventario,
         pessoa=pessoa,
         movimento=TrajeMovimentoChoices.EMPRESTIMO,
         usuario=usuario,
         obs=obs,
     )
-    for item, checado in checklist:
-        historico.checagem.filter(item=item).update(checado=checado)
+    historico.checados = dict(checklist)
+    historico.save()
     return historico
 
 
@@ -134,39 +137,176 @@ def devolver_traje(
     obs: str,
 ):
     try:
-        historico = TrajeHistorico.objects.create(
+        historico = TrajeHistorico(
             traje=inventario,
             obs=obs,
             movimento=TrajeMovimentoChoices.DEVOLUCAO,
             usuario=user,
             pessoa=None,
         )
-        checks = {item: checado for item, checado in checklist}
-        for check in historico.checagem.all():
-            check.checado = checks.get(check.item, False)
-            check.save()
+        historico.checados = dict(checklist)
+        historico.save()
     except ValidationError:
         raise
     except Exception as exc:
         raise ValidationError(str(exc))
 
 
+@dataclass
+class DevolucaoItem:
+    num_inventario: int
+    # Itens do checklist não recebidos. Os demais são marcados como checados
+    faltando: set[str] = field(default_factory=set)
+    # Linha do lote como digitada, devolvida ao formulário em caso de falha
+    linha: str = ""
+
+    @property
+    def chave(self) -> str:
+        return self.linha or str(self.num_inventario)
+
+
+@dataclass
+class ResultadoDevolucao:
+    devolvidos: list[TrajeInventario] = field(default_factory=list)
+    # linha do lote: motivo
+    falhas: dict[str, str] = field(default_factory=dict)
+
+
+def interpretar_lote_devolucao(
+    texto: str,
+) -> tuple[list[DevolucaoItem], dict[str, str]]:
+    """Lê um inventário por linha, opcionalmente seguido dos itens não recebidos:
+    123
+    124: chapéu, capa
+    Retorna os itens e as linhas inválidas"""
+    itens, falhas = [], {}
+    for linha in texto.splitlines():
+        if not (linha := linha.strip()):
+            continue
+        num_inventario, _, faltando = linha.partition(":")
+        try:
+            itens.append(
+                DevolucaoItem(
+                    int(num_inventario),
+                    {item.strip() for item in faltando.split(",") if item.strip()},
+                    linha,
+                )
+            )
+        except ValueError:
+            falhas[linha] = "Número de inventário inválido"
+    return itens, falhas
+
+
+@transaction.atomic
+def devolver_trajes(
+    usuario: User, itens: list[DevolucaoItem], obs: str = ""
+) -> ResultadoDevolucao:
+    """Devolve (ou retorna de manutenção) vários trajes numa única transação.
+    Os trajes válidos são gravados com bulk_create/bulk_update e as falhas
+    de cada inventário são reportadas sem impedir a devolução dos demais"""
+    resultado = ResultadoDevolucao()
+    inventarios = {
+        inventario.num_inventario: inventario
+        for inventario in TrajeInventario.objects.filter(
+            num_inventario__in=[item.num_inventario for item in itens]
+        )
+        .select_related("traje", "pessoa")
+        .select_for_update(of=("self",))
+    }
+
+    historicos: list[TrajeHistorico] = []
+    for item in itens:
+        if not (inventario := inventarios.pop(item.num_inventario, None)):
+            resultado.falhas[
+                item.chave
+            ] = f"Traje #{item.num_inventario} inexistente ou repetido"
+            continue
+        try:
+            validar_movimento(
+                inventario.ultimo_movimento, TrajeMovimentoChoices.DEVOLUCAO
+            )
+            if desconhecidos := item.faltando.difference(
+                inventario.get_checklist_itens()
+            ):
+                raise ValidationError(
+                    f"Itens fora do checklist de {inventario.traje}: {', '.join(sorted(desconhecidos))}"
+                )
+        except ValidationError as exc:
+            resultado.falhas[item.chave] = f"{inventario}: {exc.messages[0]}"
+            continue
+        historico = TrajeHistorico(
+            traje=inventario,
+            obs=obs,
+            movimento=TrajeMovimentoChoices.DEVOLUCAO,
+            usuario=usuario,
+            pessoa=None,
+        )
+        historico.checados = {
+            check: check not in item.faltando
+            for check in inventario.get_checklist_itens()
+        }
+        historicos.append(historico)
+        resultado.devolvidos.append(inventario)
+
+    if not historicos:
+        return resultado
+
+    historicos = TrajeHistorico.objects.bulk_create(historicos)
+    aplicar_movimentos(historicos)
+
+    TrajeHistorico.criar_checagens(historicos)
+    return resultado
+
+
+@dataclass
+class DisponibilidadeTrajes:
+    inventarios: list[TrajeInventario] = field(default_factory=list)
+    por_traje: dict[Traje, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.inventarios)
+
+
+def consultar_disponibilidade(
+    veiculo: Veiculo,
+    genero: GenerosChoices,
+    tamanho: TamanhosTrajeChoices,
+    bloquear: bool = False,
+) -> DisponibilidadeTrajes:
+    """Inventários disponíveis para o veículo, gênero e tamanho numa única consulta
+    (índice idx_inv_disp), com a contagem por traje.
+    Com bloquear, as linhas ficam bloqueadas até o fim da transação atual
+    e as já bloqueadas por outra transação são ignoradas"""
+    inventarios = (
+        TrajeInventario.objects.filter(
+            situacao=SituacaoTrajeChoices.DISPONIVEL,
+            tamanho=tamanho,
+            traje__veiculo=veiculo,
+            traje__genero=genero,
+        )
+        .select_related("traje__veiculo")
+        .order_by("num_inventario")
+    )
+    if bloquear:
+        inventarios = inventarios.select_for_update(of=("self",), skip_locked=True)
+
+    disponibilidade = DisponibilidadeTrajes(list(inventarios))
+    for inventario in disponibilidade.inventarios:
+        disponibilidade.por_traje[inventario.traje] = (
+            disponibilidade.por_traje.get(inventario.traje, 0) + 1
+        )
+    return disponibilidade
+
+
 def obter_inventario_trajes_disponiveis(
     veiculo: Veiculo, genero: GenerosChoices, tamanho: TamanhosTrajeChoices
 ) -> List[TrajeInventario]:
-    if not (trajes := Traje.objects.filter(veiculo=veiculo, genero=genero).all()):
+    if inventarios := consultar_disponibilidade(veiculo, genero, tamanho).inventarios:
+        return inventarios
+    if not Traje.objects.filter(veiculo=veiculo, genero=genero).exists():
         raise ValidationError(f"Não existem trajes cadastrados para {veiculo}")
-    inventarios = []
-    for traje in trajes:
-        inventarios.extend(
-            TrajeInventario.objects.filter(
-                traje=traje, tamanho=tamanho, situacao=SituacaoTrajeChoices.DISPONIVEL
-            ).all()
-        )
-
-    if not inventarios:
-        raise ValidationError(f"Não existem trajes disponíveis para {veiculo}")
-    return inventarios
+    raise ValidationError(f"Não existem trajes disponíveis para {veiculo}")
 
 
 def traje_com_pessoa(pessoa: Pessoa) -> TrajeInventario | None:
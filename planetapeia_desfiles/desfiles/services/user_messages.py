@@ -1,13 +1,64 @@
-import datetime
 import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
 
 from django.contrib.auth.models import User
+from django.db.models import Count, Q
 from django.http.request import HttpRequest
 from django.urls import reverse
 
 from ..models import Pessoa, PessoaRevisarSenha, UserMessage, UserMessageLevelChoices
 from ..models_utils import get_robot_user
 from ..services.date_time_provider import DateTimeProvider
+from .cache import get_cache
+
+# Mensagens mais recentes exibidas no resumo
+MENSAGENS_RECENTES = 5
+
+
+def _cache():
+    return get_cache("mensagens", default_ttl=timedelta(minutes=5))
+
+
+def invalidar_resumo_mensagens(*user_ids: int):
+    """Descarta o resumo em cache das mensagens dos usuários"""
+    for user_id in user_ids:
+        _cache().delete(f"resumo:{user_id}")
+
+
+def invalidar_revisoes_senha():
+    _cache().delete("revisoes_senha")
+
+
+@dataclass
+class ResumoMensagens:
+    """Contagens das mensagens de um usuário e as mais recentes"""
+
+    lidas: int = 0
+    nao_lidas: int = 0
+    erros: int = 0
+    alertas: int = 0
+    revisoes_senha: int = 0
+    recentes: list[UserMessage] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.lidas + self.nao_lidas + self.revisoes_senha
+
+    @property
+    def total_nao_lidas(self) -> int:
+        return self.nao_lidas + self.revisoes_senha
+
+    @property
+    def nivel_nao_lidas(self) -> UserMessageLevelChoices | None:
+        """Maior nível entre as mensagens não lidas"""
+        if self.erros:
+            return UserMessageLevelChoices.ERROR
+        if self.alertas:
+            return UserMessageLevelChoices.WARN
+        if self.total_nao_lidas:
+            return UserMessageLevelChoices.INFO
+        return None
 
 
 class UserMessages:
@@ -17,7 +68,11 @@ class UserMessages:
 
     def get_messages(self):
         if self.user.is_active:
-            for msg in UserMessage.objects.filter(user_to=self.user).order_by("when"):
+            for msg in (
+                UserMessage.objects.filter(user_to=self.user)
+                .select_related("user_from")
+                .order_by("when")
+            ):
                 yield msg
             for msg in self.get_revisoes_senha():
                 yield msg
@@ -46,20 +101,52 @@ class UserMessages:
                     + "?atendida_por__isempty=1",
                 )
 
+    def get_resumo(self) -> ResumoMensagens:
+        """Resumo das mensagens do usuário, em cache até o envio ou leitura de mensagens"""
+        if not self.user.is_active:
+            return ResumoMensagens()
+        key = f"resumo:{self.user.pk}"
+        if not (resumo := _cache().get(key)):
+            mensagens = UserMessage.objects.filter(user_to=self.user)
+            resumo = ResumoMensagens(
+                **mensagens.aggregate(
+                    lidas=Count("pk", filter=Q(read_at__isnull=False)),
+                    nao_lidas=Count("pk", filter=Q(read_at=None)),
+                    erros=Count(
+                        "pk",
+                        filter=Q(read_at=None, level=UserMessageLevelChoices.ERROR),
+                    ),
+                    alertas=Count(
+                        "pk",
+                        filter=Q(read_at=None, level=UserMessageLevelChoices.WARN),
+                    ),
+                ),
+                recentes=list(
+                    mensagens.select_related("user_from").order_by("-when")[
+                        :MENSAGENS_RECENTES
+                    ]
+                ),
+            )
+            _cache().set(key, resumo)
+        if self.user.is_staff:
+            resumo.revisoes_senha = self.revisoes_senha_count()
+        return resumo
+
+    def revisoes_senha_count(self) -> int:
+        """Revisões de senha pendentes, compartilhado entre os administradores"""
+        if (count := _cache().get("revisoes_senha")) is None:
+            count = PessoaRevisarSenha.objects.filter(
+                ativa=True, atendida_por=None
+            ).count()
+            _cache().set("revisoes_senha", count)
+        return count
+
     def messages_count(self) -> dict:
         """Retorna o número de mensagens do usuário
         {"readen":0, "unreaden":0}
         """
-        count = {"readen": 0, "unreaden": 0}
-        if self.user.is_active:
-            count["readen"] = UserMessage.objects.filter(
-                user_to=self.user, read_at__gt=datetime(2000, 1, 1)
-            ).count()
-            count["unreaden"] = UserMessage.objects.filter(
-                user_to=self.user, read_at=None
-            ).count()
-
-        return count
+        resumo = self.get_resumo()
+        return {"readen": resumo.lidas, "unreaden": resumo.total_nao_lidas}
 
     def send_message(
         self,
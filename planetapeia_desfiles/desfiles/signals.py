@@ -1,50 +1,93 @@
-import logging
-
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from .models import (
     AprovacaoChoices,
     Convite,
+    Desfile,
     InscricaoDesfile,
-    StaffPadraoVeiculo,
-    Veiculo,
+    Pessoa,
+    PessoaRevisarSenha,
+    UserMessage,
+)
+from .services import desfile_service
+from .services.cache import get_cache
+from .services.miniaturas import agendar_miniaturas
+from .services.planejamento_trajes import invalidar_planejamento_trajes
+from .services.user_messages import (
+    invalidar_resumo_mensagens,
+    invalidar_revisoes_senha,
 )
-from .models_utils import get_robot_user
 
 
 @receiver(post_save, sender=InscricaoDesfile)
 def post_save_inscricao_desfile(
     sender: InscricaoDesfile, instance: InscricaoDesfile, **kwargs
 ):
-    if not instance.convite:
+    if not kwargs.get("created") or instance.aprovacao == AprovacaoChoices.APROVADO:
+        # Inscrições pendentes novas não alteram a demanda de trajes
+        invalidar_planejamento_trajes()
+    if not instance.convite_id:
         return
-
-    # Recalcula número de inscritos aprovados
-    count = InscricaoDesfile.objects.filter(
-        convite_id=instance.convite.id, aprovacao=AprovacaoChoices.APROVADO
-    ).count()
-    if instance.convite.convidados_confirmados != count:
-        logging.getLogger("signals").info(
-            f"[post_save_inscricao_desfile] {instance.convite} convidados_confirmados {instance.convite.convidados_confirmados} -> {count}"
-        )
-        Convite.objects.filter(pk=instance.convite.pk).update(
-            convidados_confirmados=count
-        )
-        # instance.convite.convidados_confirmados = count
-        # instance.convite.save()
-
-
-@receiver(post_save, sender=Veiculo)
-def post_save_veiculo(sender, instance: Veiculo, **kwargs):
-    if StaffPadraoVeiculo.objects.filter(veiculo=instance).count():
+    if kwargs.get("created") and getattr(instance, "_vaga_reservada", False):
+        # Vaga já contada por desfile_service.inscrever_por_convite
         return
 
-    spv = StaffPadraoVeiculo.objects.create(veiculo=instance, usuario=get_robot_user())
-    logging.getLogger("signals").info(
-        f"[post_save_veiculo] criado staff padrão para {spv}"
+    # Recalcula número de inscritos aprovados e vagas reservadas
+    desfile_service.recontar_convidados([instance.convite_id])
+
+
+@receiver(post_delete, sender=InscricaoDesfile)
+def post_delete_inscricao_desfile(
+    sender: InscricaoDesfile, instance: InscricaoDesfile, **kwargs
+):
+    invalidar_planejamento_trajes()
+    desfile_service.recontar_convidados([instance.convite_id])
+
+
+@receiver(post_save, sender=Convite)
+@receiver(post_delete, sender=Convite)
+def post_save_delete_convite(sender, instance: Convite, **kwargs):
+    desfile_service.invalidar_convites(instance.hash)
+
+
+@receiver(post_save, sender=Desfile)
+def post_save_desfile(sender, instance: Desfile, **kwargs):
+    desfile_service.invalidar_convites(
+        *Convite.objects.filter(desfile=instance).values_list("hash", flat=True)
     )
 
 
+@receiver(post_save, sender=Pessoa)
+def post_save_pessoa(sender, instance: Pessoa, **kwargs):
+    # Descarta a pessoa em cache do PessoaMiddleware em todos os workers
+    get_cache("pessoas").delete(instance.pk)
+    # Gênero e tamanho do traje entram na demanda de trajes
+    invalidar_planejamento_trajes()
+    if not kwargs.get("raw"):
+        # Após o commit: o worker lê a foto gravada, e não a de uma transação desfeita
+        transaction.on_commit(lambda: agendar_miniaturas(instance))
+
+
+@receiver(post_save, sender=UserMessage)
+def post_save_user_message(sender, instance: UserMessage, **kwargs):
+    invalidar_resumo_mensagens(instance.user_to_id)
+
+
+@receiver(post_save, sender=PessoaRevisarSenha)
+def post_save_pessoa_revisar_senha(sender, instance: PessoaRevisarSenha, **kwargs):
+    invalidar_revisoes_senha()
+
+
+@receiver(user_logged_in)
+@receiver(user_logged_out)
+def user_logged_in_out(sender, request, user, **kwargs):
+    # Pessoa, permissões e navbar da requisição passam a ser de outro usuário
+    if contexto := getattr(request, "contexto", None):
+        contexto.invalidar()
+
+
 def enable():
     pass
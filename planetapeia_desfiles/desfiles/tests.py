@@ -1,3 +1,405 @@
-from django.test import TestCase
+import datetime
+import threading
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import roles
+from .models import (
+    AprovacaoChoices,
+    Convite,
+    Desfile,
+    Grupo,
+    InscricaoDesfile,
+    Pessoa,
+    PessoaStaff,
+    SituacaoTrajeChoices,
+    StaffPadrao,
+    StaffPadraoVeiculo,
+    TiposPessoasChoices,
+    Traje,
+    TrajeHistorico,
+    TrajeHistoricoChecklistItem,
+    TrajeInventario,
+    TrajeMovimentoChoices,
+    UserMessage,
+    Veiculo,
+)
+from .models_utils import nome_pesquisavel
+from .services import desfile_service, trajes_service
+from .services.busca_pessoa import buscar_pessoas
+from .views.admin.roles_view import roles_names
+
+
+class InscricaoPorConviteConcorrenteTest(TransactionTestCase):
+    MAX_CONVIDADOS = 5
+    PESSOAS = 20
+
+    def setUp(self):
+        grupo = Grupo.objects.create(nome="Grupo", imagem="grupo.png")
+        desfile = Desfile.objects.create(
+            nome="Desfile",
+            local="Local",
+            data=datetime.date.today() + datetime.timedelta(days=10),
+        )
+        self.convite = Convite.objects.create(
+            desfile=desfile,
+            grupo=grupo,
+            usuario=User.objects.create(username="padrinho"),
+            max_convidados=self.MAX_CONVIDADOS,
+        )
+        # bulk_create: sem os usuários criados em Pessoa.save
+        self.pessoas = Pessoa.objects.bulk_create(
+            Pessoa(
+                cpf=f"{i:011d}",
+                nome=f"Pessoa {i}",
+                telefone="1",
+                data_nascimento=datetime.date(1990, 1, 1),
+                genero="F",
+                peso=60,
+                altura=170,
+                tamanho_traje="M",
+                grupo=grupo,
+            )
+            for i in range(self.PESSOAS)
+        )
+
+    def test_limite_de_convidados(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Requer banco de dados com conexões concorrentes")
+        barreira = threading.Barrier(self.PESSOAS)
+        recusadas, erros = [], []
+
+        def inscrever(pessoa: Pessoa):
+            try:
+                convite = Convite.objects.get(pk=self.convite.pk)
+                barreira.wait()
+                desfile_service.inscrever_por_convite(convite, pessoa)
+            except ValidationError:
+                recusadas.append(pessoa)
+            except Exception as exc:
+                erros.append(exc)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=inscrever, args=(pessoa,))
+            for pessoa in self.pessoas
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], erros)
+        self.convite.refresh_from_db()
+        inscricoes = InscricaoDesfile.objects.filter(convite=self.convite).count()
+        self.assertEqual(self.MAX_CONVIDADOS, inscricoes)
+        self.assertEqual(self.PESSOAS - self.MAX_CONVIDADOS, len(recusadas))
+        self.assertEqual(inscricoes, self.convite.vagas_reservadas)
+
+    def test_exclusao_libera_vaga(self):
+        for pessoa in self.pessoas[: self.MAX_CONVIDADOS]:
+            desfile_service.inscrever_por_convite(self.convite, pessoa)
+        with self.assertRaises(ValidationError):
+            desfile_service.inscrever_por_convite(self.convite, self.pessoas[-1])
+
+        InscricaoDesfile.objects.filter(pessoa=self.pessoas[0]).delete()
+        self.convite.refresh_from_db()
+        self.assertEqual(self.MAX_CONVIDADOS - 1, self.convite.vagas_reservadas)
+        desfile_service.inscrever_por_convite(self.convite, self.pessoas[-1])
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+class ChangelistQueryBudgetTest(TestCase):
+    """Consultas de uma página de changelist do admin com LINHAS linhas (sessão,
+    filtros, contagens e a página). O orçamento não depende do número de linhas:
+    uma consulta por linha estoura o limite"""
+
+    LINHAS = 100
+    ORCAMENTO = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="admin")
+        usuarios = User.objects.bulk_create(
+            User(username=f"usuario{i}", first_name=f"Usuário {i}") for i in range(5)
+        )
+        grupo = Grupo.objects.create(nome="Grupo", imagem="grupo.png")
+        veiculos = Veiculo.objects.bulk_create(
+            Veiculo(nome=f"Veículo {i}", imagem="v.png", capacidade=10, qtd_staffs=2)
+            for i in range(cls.LINHAS)
+        )
+        spvs = StaffPadraoVeiculo.objects.bulk_create(
+            StaffPadraoVeiculo(veiculo=veiculo, usuario=cls.admin)
+            for veiculo in veiculos
+        )
+        pessoas = Pessoa.objects.bulk_create(
+            Pessoa(
+                cpf=f"{i:011d}",
+                nome=f"Pessoa {i}",
+                telefone="1",
+                data_nascimento=datetime.date(1990, 1, 1),
+                genero="F",
+                peso=60,
+                altura=170,
+                tamanho_traje="M",
+                grupo=grupo,
+                tipo=TiposPessoasChoices.STAFF,
+            )
+            for i in range(cls.LINHAS)
+        )
+        StaffPadrao.objects.bulk_create(
+            StaffPadrao(pessoa=pessoa, staff_padrao_veiculo=spv)
+            for pessoa, spv in zip(pessoas, spvs)
+        )
+
+        desfile = Desfile.objects.create(
+            nome="Desfile", local="Local", data=datetime.date.today()
+        )
+        convite = Convite.objects.create(
+            desfile=desfile, grupo=grupo, usuario=usuarios[0], max_convidados=999
+        )
+        InscricaoDesfile.objects.bulk_create(
+            InscricaoDesfile(
+                desfile=desfile,
+                pessoa=pessoa,
+                grupo=grupo,
+                convite=convite,
+                aprovacao=AprovacaoChoices.APROVADO,
+                aprovador=cls.admin,
+            )
+            for pessoa in pessoas
+        )
+
+        traje = Traje.objects.create(
+            nome="Traje",
+            veiculo=veiculos[0],
+            genero="F",
+            campos_checklist="chapéu\ncapa",
+        )
+        inventarios = TrajeInventario.objects.bulk_create(
+            TrajeInventario(
+                num_inventario=i + 1,
+                traje=traje,
+                tamanho="M",
+                situacao=SituacaoTrajeChoices.EMPRESTADO,
+                pessoa=pessoa,
+                usuario=cls.admin,
+            )
+            for i, pessoa in enumerate(pessoas)
+        )
+        historicos = TrajeHistorico.objects.bulk_create(
+            TrajeHistorico(
+                traje=inventario,
+                movimento=TrajeMovimentoChoices.EMPRESTIMO,
+                usuario=cls.admin,
+                pessoa=inventario.pessoa,
+            )
+            for inventario in inventarios
+        )
+        itens = TrajeHistoricoChecklistItem.objects.bulk_create(
+            TrajeHistoricoChecklistItem(historico=historico, item=item, ordem=ordem)
+            for historico in historicos
+            for ordem, item in enumerate(traje.get_checklist_itens())
+        )
+        TrajeHistorico.checagem.through.objects.bulk_create(
+            TrajeHistorico.checagem.through(
+                trajehistorico_id=item.historico_id,
+                trajehistoricochecklistitem_id=item.pk,
+            )
+            for item in itens
+        )
+
+        UserMessage.objects.bulk_create(
+            UserMessage(
+                user_from=cls.admin,
+                user_to=usuarios[i % len(usuarios)],
+                title="Título",
+                message=f"Mensagem {i}",
+            )
+            for i in range(cls.LINHAS)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertChangelistQueries(self, model):
+        url = reverse(
+            f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist"
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(self.LINHAS, len(response.context["cl"].result_list))
+        self.assertLessEqual(
+            len(queries),
+            self.ORCAMENTO,
+            "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+
+    def test_staff_padrao_veiculo(self):
+        self.assertChangelistQueries(StaffPadraoVeiculo)
+
+    def test_staffs(self):
+        self.assertChangelistQueries(PessoaStaff)
+
+    def test_inscricoes(self):
+        self.assertChangelistQueries(InscricaoDesfile)
+
+    def test_traje_historico(self):
+        self.assertChangelistQueries(TrajeHistorico)
+
+    def test_traje_inventario(self):
+        self.assertChangelistQueries(TrajeInventario)
+
+    def test_mensagens(self):
+        self.assertChangelistQueries(UserMessage)
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+)
+class RolesViewInvalidacaoTest(TestCase):
+    """Papéis alterados pelo próprio usuário valem na mesma requisição: as
+    permissões em cache no user são descartadas antes de montar a navbar"""
+
+    def setUp(self):
+        self.user = User.objects.create_user("gestor", password="gestor", is_staff=True)
+        self.user.user_permissions.add(
+            Permission.objects.get(codename=roles.ADM_PESSOAS)
+        )
+        self.client.force_login(self.user)
+
+    def campo(self, role: str) -> str:
+        return f"{self.user.pk}_{roles_names.index(role) + 1}"
+
+    def test_papeis_alterados_na_mesma_requisicao(self):
+        # Concede ALMOXARIFE e retira ADM_PESSOAS
+        response = self.client.post(
+            reverse("admin_roles"),
+            {f"{self.user.pk}_is_active": "on", self.campo(roles.ALMOXARIFE): "on"},
+        )
+        self.assertEqual(200, response.status_code)
+        user = response.wsgi_request.user
+        self.assertTrue(user.has_perm(roles.permissao(roles.ALMOXARIFE)))
+        self.assertFalse(user.has_perm(roles.permissao(roles.ADM_PESSOAS)))
+        self.assertNotIn(
+            "Gestão de pessoas",
+            [link.label for link in response.context["navbar"].userlinks],
+        )
+
+
+class BuscarPessoasTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        grupo = Grupo.objects.create(nome="Grupo", imagem="grupo.png")
+        Pessoa.objects.bulk_create(
+            Pessoa(
+                cpf=f"{i:011d}",
+                nome=nome,
+                nome_busca=nome_pesquisavel(nome),
+                telefone="1",
+                data_nascimento=datetime.date(1990, 1, 1),
+                genero="F",
+                peso=60,
+                altura=170,
+                tamanho_traje="M",
+                grupo=grupo,
+            )
+            for i, nome in enumerate(["Maria Silva", "Ana Maria", "João Souza"])
+        )
+
+    def test_busca(self):
+        self.assertEqual(
+            ["Maria Silva", "Ana Maria"],
+            list(buscar_pessoas("maria").values_list("nome", flat=True)),
+        )
+
+    def test_termo_com_aspas(self):
+        for termo in ('"', 'mar"ia', '"maria"', 'ma""'):
+            with self.subTest(termo=termo):
+                self.assertEqual([], list(buscar_pessoas(termo)))
+
+
+class TrajeChecklistTest(TestCase):
+    """Situação dos itens do checklist gravada na ordem do formulário"""
+
+    CHECKLIST = [("chapéu", True), ("capa", False), ("bota", True)]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create(username="almoxarife")
+        grupo = Grupo.objects.create(nome="Grupo", imagem="grupo.png")
+        cls.pessoa = Pessoa.objects.bulk_create(
+            [
+                Pessoa(
+                    cpf="00000000001",
+                    nome="Pessoa",
+                    telefone="1",
+                    data_nascimento=datetime.date(1990, 1, 1),
+                    genero="F",
+                    peso=60,
+                    altura=170,
+                    tamanho_traje="M",
+                    grupo=grupo,
+                )
+            ]
+        )[0]
+        veiculo = Veiculo.objects.create(
+            nome="Veículo", imagem="v.png", capacidade=10, qtd_staffs=2
+        )
+        traje = Traje.objects.create(
+            nome="Traje",
+            veiculo=veiculo,
+            genero="F",
+            campos_checklist="\n".join(item for item, _ in cls.CHECKLIST),
+        )
+        cls.inventario = TrajeInventario.objects.create(
+            num_inventario=1, traje=traje, tamanho="M", usuario=cls.usuario
+        )
+
+    def checagem(self, historico: TrajeHistorico) -> list[tuple[str, bool]]:
+        return list(historico.checagem.values_list("item", "checado"))
+
+    def test_entrega_e_devolucao(self):
+        historico = trajes_service.entregar_traje(
+            self.inventario, self.pessoa, self.usuario, "", self.CHECKLIST
+        )
+        self.assertEqual(self.CHECKLIST, self.checagem(historico))
+
+        devolucao = [(item, not checado) for item, checado in self.CHECKLIST]
+        self.inventario.refresh_from_db()
+        trajes_service.devolver_traje(self.usuario, self.inventario, devolucao, "")
+        historico = TrajeHistorico.objects.get(
+            traje=self.inventario, movimento=TrajeMovimentoChoices.DEVOLUCAO
+        )
+        self.assertEqual(devolucao, self.checagem(historico))
+
+    def test_checados_na_alteracao(self):
+        historico = trajes_service.entregar_traje(
+            self.inventario, self.pessoa, self.usuario, "", self.CHECKLIST
+        )
+        historico = TrajeHistorico.objects.get(pk=historico.pk)
+        historico.checados = {"capa": True, "bota": False}
+        historico.save()
+        self.assertEqual(
+            [("chapéu", True), ("capa", True), ("bota", False)],
+            self.checagem(historico),
+        )
@@ -1,23 +1,30 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
+from functools import reduce
 import json
+from operator import or_
 from django.contrib.admin.models import LogEntry, CHANGE
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.contrib.auth.models import Permission
+from django.contrib.auth.models import Permission, User
 from django.db.models import Q
 from django.http import HttpRequest, HttpResponse
 from django.views.generic import TemplateView
 from django.contrib import messages
 from ... import roles
-from ..utils import NavBar
 from ...models_utils import get_pessoa_name
+from ...services.metadados import metadado
 
 # Obter as permissões atuais
 roles_desc = []
 roles_names = sorted(roles.roles.keys())
 roles_desc = [roles.roles[role][0] for role in roles_names]
-user_content_type = ContentType.objects.filter(app_label="auth", model="user").first()
+
+
+@metadado(ContentType)
+def user_content_type() -> ContentType:
+    return ContentType.objects.get_for_model(get_user_model())
 
 
 @dataclass
@@ -32,52 +39,88 @@ class UserRoles:
         return self.user_name < other.user_name
 
 
+def permissoes_por_usuario(
+    users: list[User], incluir_grupos: bool = True
+) -> dict[int, set[str]]:
+    """Papéis (codenames) de cada usuário, diretos e dos grupos, com uma consulta para cada"""
+    permissoes = defaultdict(set)
+    consultas = [
+        get_user_model()
+        .user_permissions.through.objects.filter(
+            user__in=users, permission__codename__in=roles_names
+        )
+        .values_list("user_id", "permission__codename")
+    ]
+    if incluir_grupos:
+        consultas.append(
+            get_user_model()
+            .groups.through.objects.filter(
+                user__in=users, group__permissions__codename__in=roles_names
+            )
+            .values_list("user_id", "group__permissions__codename")
+        )
+    for consulta in consultas:
+        for user_id, codename in consulta:
+            permissoes[user_id].add(codename)
+    return permissoes
+
+
 class RolesView(PermissionRequiredMixin, LoginRequiredMixin, TemplateView):
     template_name = "admin/roles.html"
-    permission_required = roles.ADM_PESSOAS
+    permission_required = roles.permissao(roles.ADM_PESSOAS)
 
     @classmethod
     def get_users(cls):
-        users = []
-        for user in get_user_model().objects.filter(is_staff=True):
-            # Permissões do usuário
-            permissions = set(
-                p.codename
-                for p in Permission.objects.filter(Q(user=user) | Q(group__user=user))
-            )
-
-            user_roles = UserRoles(
+        users = list(get_user_model().objects.filter(is_staff=True))
+        permissoes = permissoes_por_usuario(users)
+        return sorted(
+            UserRoles(
                 pk=user.pk,
                 user_name=get_pessoa_name(user),
                 is_superuser=user.is_superuser,
                 is_active=user.is_active,
                 roles=[
-                    True if user.is_superuser else role in permissions
+                    True if user.is_superuser else role in permissoes[user.pk]
                     for role in roles_names
                 ],
             )
+            for user in users
+        )
 
-            users.append(user_roles)
-        return sorted(users)
-
-    def get(self, request: HttpRequest) -> HttpResponse:
-        context = {
-            "navbar": NavBar(request),
+    def get_context(self, request: HttpRequest) -> dict:
+        return {
+            "navbar": request.contexto.navbar,
             "header": "Gestão de pessoas",
             "roles": roles.roles,
             "roles_desc": roles_desc,
             "users": self.get_users(),
         }
 
-        return self.render_to_response(context)
+    def get(self, request: HttpRequest) -> HttpResponse:
+        return self.render_to_response(self.get_context(request))
 
     def post(self, request: HttpRequest) -> HttpResponse:
-        for user in get_user_model().objects.filter(is_staff=True):
+        users = list(get_user_model().objects.filter(is_staff=True))
+        # Apenas as permissões diretas são atribuídas por esta tela
+        permissoes = permissoes_por_usuario(users, incluir_grupos=False)
+        log_entries = []
+
+        def log(user: User, change: dict):
+            log_entries.append(
+                LogEntry(
+                    user=request.user,
+                    content_type=user_content_type(),
+                    object_id=user.pk,
+                    object_repr=repr(user),
+                    action_flag=CHANGE,
+                    change_message=json.dumps(change),
+                )
+            )
+
+        adicionar: list[tuple[int, str]] = []
+        remover: list[Q] = []
+        for user in users:
             is_active = bool(request.POST.get(f"{user.pk}_is_active"))
-            user_roles = {
-                name: bool(request.POST.get(f"{user.pk}_{index}"))
-                for index, name in enumerate(roles_names, 1)
-            }
             if is_active != user.is_active:
                 if request.user == user:
                     messages.warning(
@@ -91,57 +134,57 @@ class RolesView(PermissionRequiredMixin, LoginRequiredMixin, TemplateView):
 
                 user.is_active = is_active
                 user.save()
-                change = dict(active=is_active)
-                LogEntry.objects.create(
-                    user=request.user,
-                    content_type=user_content_type,
-                    object_id=user.pk,
-                    object_repr=repr(user),
-                    action_flag=CHANGE,
-                    change_message=json.dumps(change),
-                )
+                log(user, dict(active=is_active))
 
-            username = get_pessoa_name(user)
             if user.is_superuser:
                 continue  # Não é necessário atribuir permissões aos super usuários
 
-            for role, enabled in user_roles.items():
-                permission = user.user_permissions.filter(codename=role).first()
-                rolename = roles_desc[roles_names.index(role)]
-                change = dict(permission=role, permission_name=rolename)
-                if permission and not enabled:
-                    messages.info(
-                        request, f"Removida permissão {rolename} do usuário {username}"
-                    )
-                    user.user_permissions.remove(permission)
-                    change["action"] = "add"
-
-                elif enabled and not permission:
-                    if user.is_superuser:
-                        break
+            username = get_pessoa_name(user)
+            for index, role in enumerate(roles_names, 1):
+                enabled = bool(request.POST.get(f"{user.pk}_{index}"))
+                if enabled == (role in permissoes[user.pk]):
+                    continue
+                rolename = roles_desc[index - 1]
+                if enabled:
                     messages.info(
                         request,
                         f"Adicionada permissão {rolename} ao usuário {username}",
                     )
-                    permission = Permission.objects.filter(codename=role).first()
-                    user.user_permissions.add(permission)
-                    change["action"] = "remove"
-
-                if change.get("action"):
-                    LogEntry.objects.create(
-                        user=request.user,
-                        content_type=user_content_type,
-                        object_id=user.pk,
-                        object_repr=repr(user),
-                        action_flag=CHANGE,
-                        change_message=json.dumps(change),
+                    adicionar.append((user.pk, role))
+                else:
+                    messages.info(
+                        request, f"Removida permissão {rolename} do usuário {username}"
                     )
+                    remover.append(Q(user_id=user.pk, permission__codename=role))
+                log(
+                    user,
+                    dict(
+                        permission=role,
+                        permission_name=rolename,
+                        action="add" if enabled else "remove",
+                    ),
+                )
 
-        context = {
-            "navbar": NavBar(request),
-            "header": "Gestão de pessoas",
-            "roles": roles.roles,
-            "roles_desc": roles_desc,
-            "users": self.get_users(),
-        }
-        return self.render_to_response(context)
+        UserPermission = get_user_model().user_permissions.through
+        if remover:
+            UserPermission.objects.filter(reduce(or_, remover)).delete()
+        if adicionar:
+            # Mesma permissão de Permission.objects.filter(codename=role).first()
+            permission_ids = {}
+            for permission in Permission.objects.filter(
+                codename__in={role for _, role in adicionar}
+            ).order_by("-pk"):
+                permission_ids[permission.codename] = permission.pk
+            UserPermission.objects.bulk_create(
+                [
+                    UserPermission(user_id=user_id, permission_id=permission_ids[role])
+                    for user_id, role in adicionar
+                    if role in permission_ids
+                ],
+                ignore_conflicts=True,
+            )
+        LogEntry.objects.bulk_create(log_entries)
+
+        # Permissões do próprio usuário podem ter sido alteradas
+        request.contexto.invalidar("permissoes", "navbar")
+        return self.render_to_response(self.get_context(request))
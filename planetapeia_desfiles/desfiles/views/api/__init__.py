@@ -1,8 +1,10 @@
 from django.urls import path
 
 from .busca_pessoa import busca_pessoa
+from .miniatura import miniatura
 
 
 paths = [
     path("api/busca_pessoa", busca_pessoa, name="api_busca_pessoa"),
+    path("api/miniatura/<str:cpf>/<int:largura>", miniatura, name="api_miniatura"),
 ]
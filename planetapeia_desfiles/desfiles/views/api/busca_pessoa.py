@@ -1,42 +1,40 @@
+from django.core.paginator import Paginator
 from django.http.request import HttpRequest
 from django.http.response import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
-from ...models import (
-    AprovacaoChoices,
-    InscricaoDesfile,
-    Pessoa,
-    Traje,
-    TrajeInventario,
-    nome_pesquisavel,
-)
-from ...services.date_time_provider import DateTimeProvider
+from ...models import Pessoa, nome_pesquisavel
+from ...services.busca_pessoa import buscar_pessoas
+from ...services.pessoa_service import obter_situacao_pessoas
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+
+def _get_int(request: HttpRequest, name: str, default: int) -> int:
+    try:
+        return int(request.GET.get(name, default))
+    except ValueError:
+        return default
 
 
 @csrf_exempt
 def busca_pessoa(request: HttpRequest):
-    response = dict(count=0, items=[])
+    """Busca de pessoas por nome ou CPF, paginada
+    Parâmetros: nome, limite (padrão 50, máximo 200) e pagina (iniciando em 1)"""
+    response = dict(count=0, items=[], total=0, pagina=1, paginas=0)
     if nome := nome_pesquisavel(request.GET.get("nome")):
         if (cpf := "".join([c for c in nome if c.isnumeric()])) and len(cpf) == 11:
-            pessoas = [Pessoa.objects.filter(pk=cpf).first()]
+            pessoas = Pessoa.objects.filter(pk=cpf).order_by("pk")
         else:
-            pessoas = (
-                Pessoa.objects.filter(nome_busca__icontains=nome)
-                .order_by("nome_busca")
-                .all()
-            )
-        for pessoa in pessoas:
-            traje_inventario = TrajeInventario.objects.filter(pessoa=pessoa).first()
-            inscricao = InscricaoDesfile.objects.filter(
-                pessoa=pessoa,
-                data_desfile__gte=DateTimeProvider.today(),
-                aprovacao=AprovacaoChoices.APROVADO,
-            ).first()
-            traje = (
-                None
-                if not inscricao
-                else Traje.objects.filter(veiculo=inscricao.veiculo.veiculo).first()
-            )
+            pessoas = buscar_pessoas(nome)
+
+        limite = min(max(_get_int(request, "limite", LIMITE_PADRAO), 1), LIMITE_MAXIMO)
+        paginator = Paginator(pessoas, limite)
+        page = paginator.get_page(_get_int(request, "pagina", 1))
+
+        for situacao in obter_situacao_pessoas(page.object_list):
+            pessoa, traje_inventario = situacao.pessoa, situacao.traje_inventario
             response["items"].append(
                 dict(
                     cpf=pessoa.pk,
@@ -45,13 +43,20 @@ def busca_pessoa(request: HttpRequest):
                     traje_inventario_desc=str(traje_inventario)
                     if traje_inventario
                     else "",
-                    inscricao=None if not inscricao else str(inscricao),
+                    inscricao=None
+                    if not situacao.inscricao
+                    else str(situacao.inscricao),
                     traje=None
-                    if not traje
-                    else (f"{traje} {pessoa.get_tamanho_traje_display()}"),
+                    if not situacao.traje
+                    else (f"{situacao.traje} {pessoa.get_tamanho_traje_display()}"),
                 )
             )
 
-        response["count"] = len(response["items"])
+        response.update(
+            count=len(response["items"]),
+            total=paginator.count,
+            pagina=page.number,
+            paginas=paginator.num_pages,
+        )
 
     return JsonResponse(response)
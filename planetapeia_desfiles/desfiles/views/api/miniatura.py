@@ -0,0 +1,32 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponseForbidden
+from django.http.request import HttpRequest
+from django.shortcuts import redirect
+from django.views.decorators.cache import never_cache
+
+from ...models import Pessoa
+from ...services.face_recognition import LARGURAS_MINIATURA
+from ...services.miniaturas import agendar_miniaturas
+
+
+@never_cache
+@login_required
+def miniatura(request: HttpRequest, cpf: str, largura: int):
+    """Miniatura do rosto da pessoa. Se ainda não foi gerada, a geração é agendada
+    no pool de miniaturas e o ícone do gênero é retornado até que fique pronta"""
+    if largura not in LARGURAS_MINIATURA:
+        raise Http404
+    if not (request.user.is_staff or (request.pessoa and request.pessoa.pk == cpf)):
+        return HttpResponseForbidden()
+    if not (
+        pessoa := Pessoa.objects.only("cpf", "foto", "miniaturas", "genero")
+        .filter(pk=cpf)
+        .first()
+    ):
+        raise Http404
+
+    if url := pessoa.get_miniatura(largura):
+        return redirect(url)
+    if pessoa.foto:
+        agendar_miniaturas(pessoa)
+    return redirect(pessoa.get_icone())
@@ -6,7 +6,7 @@ from django.urls import reverse
 from django.views.generic import TemplateView
 
 from ...models import Pessoa
-from ..utils import NavBar, get_post_data, use_genero
+from ..utils import get_post_data, use_genero
 
 
 class LoginView(TemplateView):
@@ -18,7 +18,7 @@ class LoginView(TemplateView):
             return redirect("home")
 
         context = {
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "header": "Login",
         }
 
@@ -29,7 +29,7 @@ class LoginView(TemplateView):
 
         if not (user := authenticate(request, username=cpf, password=senha)):
             context = {
-                "navbar": NavBar(request),
+                "navbar": request.contexto.navbar,
                 "header": "Login",
             }
             # Verificar se seu usuário existe
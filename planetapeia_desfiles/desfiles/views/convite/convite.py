@@ -10,26 +10,31 @@ from django.views.generic import TemplateView
 from ...models import (
     AprovacaoChoices,
     Convite,
-    Desfile,
     InscricaoDesfile,
     Pessoa,
     TiposPessoasChoices,
     StaffPadrao,
+    VeiculoDesfile,
 )
 from ...models_utils import cpf_validator
-from ..utils import HttpEncryptedRedirectResponse, NavBar
+from ...services import desfile_service
+from ..utils import HttpEncryptedRedirectResponse
 
 
 class ConviteView(TemplateView):
     template_name = "convite/convite.html"
 
-    def _get_convite(self, hash: str) -> Convite:
-        if convite := Convite.objects.filter(hash=hash).first():
+    def _get_convite(self, hash: str, em_cache: bool = False) -> Convite:
+        if convite := (
+            desfile_service.obter_convite(hash)
+            if em_cache
+            else Convite.objects.select_related("desfile").filter(hash=hash).first()
+        ):
             if convite.valido_ate < date.today():
                 raise ValidationError(
                     f"Este convite não é mais válido ({convite.valido_ate:%d/%m/%Y})"
                 )
-            if convite.convidados_confirmados >= convite.max_convidados:
+            if convite.vagas_reservadas >= convite.max_convidados:
                 raise ValidationError(
                     f"O limite de {convite.max_convidados} pessoas para este convite já foi atingido"
                 )
@@ -41,7 +46,7 @@ class ConviteView(TemplateView):
         hash = kwargs.get("hash")
         convite = None
         context = {
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "title": "Planetapéia - Convite",
             "header": "Convite inválido",
         }
@@ -52,12 +57,12 @@ class ConviteView(TemplateView):
                     "Você deve utilizar o link de convite fornecido pelo seu padrinho ou líder de grupo",
                 )
             else:
-                convite = self._get_convite(hash)
+                convite = self._get_convite(hash, em_cache=True)
                 context.update(
                     {
                         "convite": convite,
                         "desfile": convite.desfile,
-                        "header": f"Convite para o desfile {Desfile.objects.first()}",
+                        "header": f"Convite para o desfile {convite.desfile}",
                         "cpf": request.user.username,
                     }
                 )
@@ -101,15 +106,15 @@ class ConviteView(TemplateView):
                 veiculo = None
                 if staff_padrao := StaffPadrao.objects.filter(pessoa=pessoa).first():
                     # TODO: Implementar verificação nos staff-padrão para obter o tipo
-                    veiculo = staff_padrao.staff_padrao_veiculo.veiculo
+                    veiculo = VeiculoDesfile.objects.filter(
+                        desfile=desfile,
+                        veiculo=staff_padrao.staff_padrao_veiculo.veiculo,
+                    ).first()
                     tipo_pessoa = pessoa.tipo
 
-                inscricao = InscricaoDesfile.objects.create(
-                    desfile=desfile,
-                    pessoa=pessoa,
-                    tipo_pessoa=tipo_pessoa,
-                    convite=convite,
-                    veiculo=veiculo,
+                # Reserva a vaga e inscreve na mesma transação
+                inscricao = desfile_service.inscrever_por_convite(
+                    convite, pessoa, tipo_pessoa=tipo_pessoa, veiculo=veiculo
                 )
                 messages.success(request, f"Inscrição {inscricao}")
 
@@ -131,7 +136,7 @@ class ConviteView(TemplateView):
             context={
                 "title": "Planetapéia - Convite",
                 "header": str(desfile),
-                "navbar": NavBar(request),
+                "navbar": request.contexto.navbar,
                 "convite": convite,
                 "desfile": desfile,
                 "pessoa": pessoa,
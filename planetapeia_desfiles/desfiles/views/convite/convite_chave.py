@@ -8,7 +8,6 @@ from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
 from ...models import Convite
-from ..utils import NavBar
 
 
 class ConviteChaveView(TemplateView):
@@ -18,7 +17,7 @@ class ConviteChaveView(TemplateView):
         if convite := Convite.objects.filter(hash=hash).first():
             if convite.valido_ate < date.today():
                 raise ValidationError("Este convite não é mais válido")
-            if convite.convidados_confirmados >= convite.max_convidados:
+            if convite.vagas_reservadas >= convite.max_convidados:
                 raise ValidationError(
                     f"O limite de {convite.max_convidados} pessoas para este convite já foi atingido"
                 )
@@ -28,7 +27,7 @@ class ConviteChaveView(TemplateView):
 
     def get(self, request: HttpRequest) -> HttpResponse:
         context = {
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "title": "Planetapéia - Convite",
             "header": "Convite por chave",
         }
@@ -44,7 +43,7 @@ class ConviteChaveView(TemplateView):
         else:
             return redirect("convite", chave)
         context = {
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "title": "Planetapéia - Convite",
             "header": "Convite por chave",
         }
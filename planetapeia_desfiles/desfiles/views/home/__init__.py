@@ -1,32 +1,44 @@
+from datetime import timedelta
+
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpRequest, HttpResponse
 from django.urls import path
 from django.views.generic import TemplateView
 
-from ..utils import NavBar
+from ...services.cache import get_cache
 from .convites_ativos import get_convites_ativos
 from .convites_pendentes import get_convites_pendentes
 from .desfiles_ativos import get_desfiles_ativos
+from .home_card import HomeCard
 from .meus_convites import get_meus_convites
 from .revisoes_senha import get_revisoes_senha
 from .trajes import get_trajes
 
 
+def get_cards(request: HttpRequest) -> list[HomeCard | None]:
+    """Cards da home do usuário, em cache por um minuto"""
+    cache = get_cache("home_cards", default_ttl=timedelta(minutes=1))
+    if (cards := cache.get(request.user.pk)) is None:
+        cards = [
+            get_convites_pendentes(request),
+            get_convites_ativos(request),
+            get_desfiles_ativos(request),
+            get_revisoes_senha(request),
+            get_meus_convites(request),
+            get_trajes(request),
+        ]
+        cache.set(request.user.pk, cards)
+    return cards
+
+
 class HomeView(LoginRequiredMixin, TemplateView):
     template_name = "home/home.html"
 
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         context = {
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "header": "Home",
-            "cards": [
-                get_convites_pendentes(request),
-                get_convites_ativos(request),
-                get_desfiles_ativos(request),
-                get_revisoes_senha(request),
-                get_meus_convites(request),
-                get_trajes(request),
-            ],
+            "cards": get_cards(request),
         }
         return self.render_to_response(context)
 
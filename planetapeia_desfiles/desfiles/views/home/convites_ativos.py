@@ -1,32 +1,38 @@
 from datetime import date
 
+from django.db.models import QuerySet
 from django.http import HttpRequest
 from django.urls import reverse
 
-from ...models import Convite, Pessoa
+from ...models import Convite
 from .decorators import just_admin
 from .home_card import HomeCard
 
 
+def convites_ativos(request: HttpRequest) -> QuerySet[Convite]:
+    """Convites de desfiles futuros do grupo da pessoa ou, sem pessoa, de todos os grupos"""
+    convites = Convite.objects.filter(desfile__data__gte=date.today()).select_related(
+        "desfile", "grupo"
+    )
+    if request.pessoa:
+        convites = convites.filter(grupo_id=request.pessoa.grupo_id)
+    return convites
+
+
 @just_admin
 def get_convites_ativos(request: HttpRequest) -> HomeCard:
-    try:
-        pessoa = Pessoa.objects.get(pk=request.user.username)
-        convites = Convite.objects.filter(
-            grupo=pessoa.grupo, desfile__data__gte=date.today()
-        )
-        text = f"Convites ativos para o grupo {pessoa.grupo}"
-    except Pessoa.DoesNotExist:
-        convites = Convite.objects.filter(desfile__data__gte=date.today())
+    if request.pessoa:
+        text = f"Convites ativos para o grupo {request.pessoa.grupo}"
+    else:
         text = "Todos os convites ativos"
 
     links = []
-    for convite in convites:
+    for convite in convites_ativos(request):
         links.append(
             (
                 f"{convite.desfile} [{convite.grupo}]",
                 reverse("admin:desfiles_inscricaodesfile_changelist")
-                + f"?aprovacao__exact=A&grupo__id__exact={convite.grupo.id}",
+                + f"?aprovacao__exact=A&grupo__id__exact={convite.grupo_id}",
             )
         )
 
@@ -1,9 +1,9 @@
-from datetime import date
-
+from django.db.models import Count, Q
 from django.http import HttpRequest
 from django.urls import reverse
 
-from ...models import AprovacaoChoices, Convite, InscricaoDesfile, Pessoa
+from ...models import AprovacaoChoices
+from .convites_ativos import convites_ativos
 from .home_card import HomeCard
 
 from .decorators import just_admin
@@ -11,30 +11,30 @@ from .decorators import just_admin
 
 @just_admin
 def get_convites_pendentes(request: HttpRequest) -> HomeCard:
-    try:
-        pessoa = Pessoa.objects.get(pk=request.user.username)
-        convites = Convite.objects.filter(
-            grupo=pessoa.grupo, desfile__data__gte=date.today()
-        )
-    except Pessoa.DoesNotExist:
-        convites = Convite.objects.filter(desfile__data__gte=date.today())
     convites_pendentes = []
     links = []
-    for convite in convites:
-        if pendentes := InscricaoDesfile.objects.filter(
-            convite=convite, aprovacao=AprovacaoChoices.PENDENTE
-        ).count():
-            convites_pendentes.append(
-                ([f"{convite.desfile} [{convite.grupo}]"], pendentes)
-            )
-            links.append(
-                (
-                    f"{convite.desfile} [{convite.grupo}]",
-                    reverse("admin:desfiles_inscricaodesfile_changelist")
-                    + f"?aprovacao__exact=P&grupo__id__exact={convite.grupo.id}",
-                    pendentes,
-                )  # &
+    # Inscrições pendentes contadas numa única consulta agrupada por convite
+    for convite in (
+        convites_ativos(request)
+        .annotate(
+            pendentes=Count(
+                "inscricaodesfile",
+                filter=Q(inscricaodesfile__aprovacao=AprovacaoChoices.PENDENTE),
             )
+        )
+        .filter(pendentes__gt=0)
+    ):
+        convites_pendentes.append(
+            ([f"{convite.desfile} [{convite.grupo}]"], convite.pendentes)
+        )
+        links.append(
+            (
+                f"{convite.desfile} [{convite.grupo}]",
+                reverse("admin:desfiles_inscricaodesfile_changelist")
+                + f"?aprovacao__exact=P&grupo__id__exact={convite.grupo_id}",
+                convite.pendentes,
+            )  # &
+        )
 
     return HomeCard(
         "Convites pendentes",
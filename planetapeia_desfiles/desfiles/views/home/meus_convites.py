@@ -10,7 +10,7 @@ from .home_card import HomeCard
 def get_meus_convites(request: HttpRequest):
     if InscricaoDesfile.objects.filter(
         pessoa=request.pessoa, desfile__data__gte=date.today()
-    ).all():
+    ).exists():
         return HomeCard(
             "Convites",
             text="Seus convites para desfilar no Planetapéia",
@@ -8,7 +8,7 @@ from .home_card import HomeCard
 
 @just_admin
 def get_revisoes_senha(request: HttpRequest):
-    if revisoes := len(list(UserMessages(request).get_revisoes_senha())):
+    if revisoes := UserMessages(request).revisoes_senha_count():
         return HomeCard(
             "Revisões de senha",
             links=[
@@ -6,7 +6,7 @@ from .home_card import HomeCard
 
 
 def get_trajes(request: HttpRequest):
-    if request.user.has_perm(ALMOXARIFE):
+    if request.contexto.tem_permissao(ALMOXARIFE):
         return HomeCard(
             "Gestão de Trajes",
             text="Movimentação de trajes (entrada, entrega, devolução, manutenção, etc)",
@@ -8,7 +8,7 @@ from django.views.generic import TemplateView
 
 from ...models import Convite, Grupo, Pessoa
 from ...services.user_messages import UserMessages
-from ..utils import HttpEncryptedRedirectResponse, NavBar
+from ..utils import HttpEncryptedRedirectResponse
 
 
 class CadastroPessoaView(TemplateView):
@@ -25,7 +25,7 @@ class CadastroPessoaView(TemplateView):
 
         context = {
             "cpf": cpf,
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "header": "Cadastro de Pessoa",
             "grupo": grupo,
             "grupo_id": grupo_id,
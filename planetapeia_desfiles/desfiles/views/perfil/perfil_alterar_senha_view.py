@@ -6,7 +6,7 @@ from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
-from ...views.utils import NavBar, get_post_data
+from ...views.utils import get_post_data
 
 
 class AlterarSenhaView(LoginRequiredMixin, TemplateView):
@@ -23,7 +23,7 @@ class AlterarSenhaView(LoginRequiredMixin, TemplateView):
             label_nome=label_nome,
             username=request.user.get_username(),
             fullname=nome_pessoa,
-            navbar=NavBar(request),
+            navbar=request.contexto.navbar,
         )
 
         return self.render_to_response(context)
@@ -4,7 +4,7 @@ from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
-from ...views.utils import NavBar, get_post_data
+from ...views.utils import get_post_data
 
 
 class EditarView(LoginRequiredMixin, TemplateView):
@@ -17,7 +17,7 @@ class EditarView(LoginRequiredMixin, TemplateView):
 
         context = {
             "pessoa": pessoa,
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "header": "Perfil",
         }
         return self.render_to_response(context)
@@ -3,8 +3,6 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpRequest, HttpResponse
 from django.views.generic import TemplateView
 
-from ...views.utils import NavBar
-
 
 class FotoView(LoginRequiredMixin, TemplateView):
     template_name = "perfil/perfil_foto.html"
@@ -15,7 +13,9 @@ class FotoView(LoginRequiredMixin, TemplateView):
                 request,
                 f"O usuário {request.user} é um administrador sem perfil de pessoa. Não há fotografia vinculada a ele",
             )
-        context = dict(navbar=NavBar(request), foto=request.foto, disabled=disabled)
+        context = dict(
+            navbar=request.contexto.navbar, foto=request.foto, disabled=disabled
+        )
 
         return self.render_to_response(context)
 
@@ -4,21 +4,25 @@ from django.http import HttpRequest, HttpResponse
 from django.views.generic import TemplateView
 
 from ...services.user_messages import UserMessages
-from ...views.utils import NavBar, use_plural
+from ...views.utils import use_plural
 
 
 class MensagensView(LoginRequiredMixin, TemplateView):
     template_name = "perfil/mensagens.html"
 
     def get(self, request: HttpRequest) -> HttpResponse:
-        context = {"navbar": NavBar(request)}
-        return self.render_to_response(context)
+        return self.render_to_response(self.get_context(request))
+
+    def get_context(self, request: HttpRequest) -> dict:
+        return {
+            "navbar": request.contexto.navbar,
+            "user_messages": list(UserMessages(request).get_messages()),
+        }
 
     def post(self, request: HttpRequest):
-        navbar = NavBar(request)
         readen_msg = {
             msg.pk: bool(request.POST.get(f"msg_{msg.pk}"))
-            for msg in navbar.user_messages
+            for msg in UserMessages(request).get_messages()
             if msg.pk
         }
         updated_count = 0
@@ -29,6 +33,7 @@ class MensagensView(LoginRequiredMixin, TemplateView):
             request,
             f"{updated_count} {use_plural(updated_count,'mensagem atualizada','mensagens atualizadas')}",
         )
+        if updated_count:
+            request.contexto.invalidar("navbar")
 
-        context = {"navbar": NavBar(request)}
-        return self.render_to_response(context)
+        return self.render_to_response(self.get_context(request))
@@ -6,14 +6,14 @@ from django.http.response import HttpResponse as HttpResponse
 from django.views.generic import TemplateView
 
 from ...models import AprovacaoChoices, InscricaoDesfile
-from ..utils import use_genero, NavBar
+from ..utils import use_genero
 
 
 class MeusConvitesView(LoginRequiredMixin, TemplateView):
     template_name = "perfil/perfil_convites.html"
 
     def get(self, request: HttpRequest) -> HttpResponse:
-        context = {"header": "Meus convites", "navbar": NavBar(request)}
+        context = {"header": "Meus convites", "navbar": request.contexto.navbar}
         if inscricoes := InscricaoDesfile.objects.filter(
             pessoa=request.pessoa, desfile__data__gte=date.today()
         ).all():
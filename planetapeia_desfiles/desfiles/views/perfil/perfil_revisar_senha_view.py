@@ -7,7 +7,6 @@ from django.views.generic import TemplateView
 
 from ...models_utils import cpf_validator
 from ...services import auth_service
-from ..utils import NavBar
 
 
 class RevisarSenha(TemplateView):
@@ -22,7 +21,7 @@ class RevisarSenha(TemplateView):
             messages.warning(request, "CPF inválido")
             return redirect("login")
 
-        context = dict(header="Revisar senha", navbar=NavBar(request), cpf=cpf)
+        context = dict(header="Revisar senha", navbar=request.contexto.navbar, cpf=cpf)
         return self.render_to_response(context)
 
     def post(self, request: HttpRequest, cpf):
@@ -4,8 +4,6 @@ from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
-from ...views.utils import NavBar
-
 
 class PerfilView(LoginRequiredMixin, TemplateView):
     template_name = "perfil/perfil_form.html"
@@ -17,7 +15,7 @@ class PerfilView(LoginRequiredMixin, TemplateView):
 
         context = {
             "pessoa": pessoa,
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
             "header": "Perfil",
             "readonly": True,
         }
@@ -7,8 +7,6 @@ from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
-from ..utils import NavBar
-
 
 class Index(TemplateView):
     template_name = "index.html"
@@ -16,7 +14,7 @@ class Index(TemplateView):
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         context = {
             "header": "Sistema de gestão de desfiles",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
         if request.user.pk:
             return redirect("home")
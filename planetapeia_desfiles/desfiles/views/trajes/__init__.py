@@ -2,13 +2,20 @@
 from django.urls import path
 
 from .trajes_devolucao import TrajesDevolucao
+from .trajes_devolucao_lote import TrajesDevolucaoLote
 from .trajes_emprestimo import TrajesEmprestimo
 from .trajes_entrega_pessoa import TrajesEntregaPessoa
 from .trajes_index import TrajesIndex
 from .trajes_op import TrajesOp
+from .trajes_planejamento import TrajesPlanejamento
 
 paths = [
     path("trajes", TrajesIndex.as_view(), name="trajes_index"),
+    path(
+        "trajes/planejamento",
+        TrajesPlanejamento.as_view(),
+        name="trajes_planejamento",
+    ),
     path(
         "trajes/entrega/<str:cpf>",
         TrajesEntregaPessoa.as_view(),
@@ -20,6 +27,11 @@ paths = [
         {"op": "op"},
         name="trajes_op",
     ),
+    path(
+        "trajes/devolucao/lote",
+        TrajesDevolucaoLote.as_view(),
+        name="trajes_devolucao_lote",
+    ),
     path(
         "trajes/devolucao/<int:num_inventario>",
         TrajesDevolucao.as_view(),
@@ -9,7 +9,7 @@ from ...models import SituacaoTrajeChoices
 from ...models_utils import get_pessoa_name
 from ...roles import ALMOXARIFE
 from ...services import trajes_service
-from ..utils import NavBar, get_post_data
+from ..utils import get_post_data
 
 
 class TrajesDevolucao(PermissionRequiredMixin, LoginRequiredMixin, TemplateView):
@@ -19,7 +19,7 @@ class TrajesDevolucao(PermissionRequiredMixin, LoginRequiredMixin, TemplateView)
     def get(self, request: HttpRequest, num_inventario: int) -> HttpResponse:
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
         try:
             inventario = trajes_service.validar_devolucao_traje(num_inventario)
@@ -45,7 +45,7 @@ class TrajesDevolucao(PermissionRequiredMixin, LoginRequiredMixin, TemplateView)
         cpf, inventario = get_post_data(request, "cpf", "inventario")
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
         try:
             inventario = trajes_service.validar_devolucao_traje(num_inventario)
@@ -0,0 +1,51 @@
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.http import HttpRequest, HttpResponse
+from django.views.generic import TemplateView
+
+from ...models_utils import get_pessoa_name
+from ...roles import ALMOXARIFE
+from ...services import trajes_service
+from ..utils import get_post_data, use_plural
+
+
+class TrajesDevolucaoLote(PermissionRequiredMixin, LoginRequiredMixin, TemplateView):
+    template_name = "trajes/devolucao_lote.html"
+    permission_required = ALMOXARIFE
+
+    def get_context(self, request: HttpRequest, **kwargs) -> dict:
+        return {
+            "header": "Devolução de trajes em lote",
+            "navbar": request.contexto.navbar,
+            "recebedor": get_pessoa_name(request.user),
+            **kwargs,
+        }
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        return self.render_to_response(self.get_context(request))
+
+    def post(self, request: HttpRequest) -> HttpResponse:
+        texto, obs = get_post_data(request, "inventarios", "obs")
+        itens, falhas = trajes_service.interpretar_lote_devolucao(texto)
+        resultado = trajes_service.devolver_trajes(request.user, itens, obs)
+        resultado.falhas.update(falhas)
+
+        if devolvidos := len(resultado.devolvidos):
+            messages.success(
+                request,
+                f"{devolvidos} {use_plural(devolvidos, 'traje recebido', 'trajes recebidos')}",
+            )
+        if resultado.falhas:
+            messages.warning(
+                request,
+                f"{len(resultado.falhas)} {use_plural(len(resultado.falhas), 'linha não processada', 'linhas não processadas')}",
+            )
+
+        return self.render_to_response(
+            self.get_context(
+                request,
+                resultado=resultado,
+                # Mantém as linhas com falha no formulário para correção
+                inventarios="\n".join(resultado.falhas),
+            )
+        )
@@ -6,7 +6,7 @@ from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
 from ...roles import ALMOXARIFE
-from ..utils import NavBar, get_post_data
+from ..utils import get_post_data
 from ...services import trajes_service
 
 
@@ -25,7 +25,7 @@ class TrajesEmprestimo(PermissionRequiredMixin, LoginRequiredMixin, TemplateView
             ) = trajes_service.validar_entrega_traje(pessoa_id, num_inventario)
             context = {
                 "header": "Empréstimo de traje",
-                "navbar": NavBar(request),
+                "navbar": request.contexto.navbar,
                 "pessoa": pessoa,
                 "desfile": inscricao_desfile.desfile,
                 "traje_inventario": traje_inventario,
@@ -7,7 +7,7 @@ from django.views.generic import TemplateView
 
 from ...roles import ALMOXARIFE
 from ...services import desfile_service, pessoa_service, trajes_service
-from ..utils import NavBar, get_post_data
+from ..utils import get_post_data
 
 
 class TrajesEntregaPessoa(PermissionRequiredMixin, LoginRequiredMixin, TemplateView):
@@ -28,7 +28,7 @@ class TrajesEntregaPessoa(PermissionRequiredMixin, LoginRequiredMixin, TemplateV
             )
             context = dict(
                 header="Entrega de traje",
-                navbar=NavBar(request),
+                navbar=request.contexto.navbar,
                 trajes=trajes,
                 pessoa=pessoa,
                 inscricao=inscricao,
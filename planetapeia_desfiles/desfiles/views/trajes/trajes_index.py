@@ -12,18 +12,18 @@ from ...models import (
 )
 from ...roles import ALMOXARIFE
 from ...services import trajes_service
-from ..utils import NavBar, get_post_data
+from ..utils import get_post_data
 
 
 class TrajesIndex(LoginRequiredMixin, TemplateView):
     template_name = "trajes/index.html"
 
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
-        if not request.user.has_perm(ALMOXARIFE):
+        if not request.contexto.tem_permissao(ALMOXARIFE):
             return HttpResponseForbidden()
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
 
         return self.render_to_response(context)
@@ -114,7 +114,7 @@ class TrajesIndex(LoginRequiredMixin, TemplateView):
     def post(self, request: HttpRequest) -> HttpResponse:
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
         ops = request.POST.get("ops")
 
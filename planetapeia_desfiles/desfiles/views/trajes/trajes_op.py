@@ -6,18 +6,18 @@ from django.views.generic import TemplateView
 
 from ...models import Pessoa, TrajeInventario
 from ...roles import ALMOXARIFE
-from ..utils import NavBar, get_post_data
+from ..utils import get_post_data
 
 
 class TrajesOp(LoginRequiredMixin, TemplateView):
     template_name = "trajes/op.html"
 
     def get(self, request: HttpRequest, num_inventario: int) -> HttpResponse:
-        if not request.user.has_perm(ALMOXARIFE):
+        if not request.contexto.tem_permissao(ALMOXARIFE):
             return HttpResponseForbidden()
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
 
         return self.render_to_response(context)
@@ -26,7 +26,7 @@ class TrajesOp(LoginRequiredMixin, TemplateView):
         cpf, inventario = get_post_data(request, "cpf", "inventario")
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
         traje, pessoa = None, None
         try:
@@ -0,0 +1,40 @@
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.http import HttpRequest, HttpResponse
+from django.views.generic import TemplateView
+
+from ...models import Desfile, SituacaoDesfileChoices
+from ...roles import ALMOXARIFE
+from ...services.planejamento_trajes import planejar_trajes
+
+
+class TrajesPlanejamento(PermissionRequiredMixin, LoginRequiredMixin, TemplateView):
+    template_name = "trajes/planejamento.html"
+    permission_required = ALMOXARIFE
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        desfiles = list(
+            Desfile.objects.filter(
+                situacao__in=[
+                    SituacaoDesfileChoices.ABERTO,
+                    SituacaoDesfileChoices.CONFIRMADO,
+                ]
+            ).order_by("data")
+        )
+        desfile_id = request.GET.get("desfile")
+        desfile = next(
+            (desfile for desfile in desfiles if str(desfile.pk) == desfile_id),
+            desfiles[0] if desfiles else None,
+        )
+        context = {
+            "header": "Planejamento de trajes",
+            "navbar": request.contexto.navbar,
+            "desfiles": desfiles,
+            "desfile": desfile,
+        }
+        if desfile:
+            context["planejamento"] = planejar_trajes(desfile)
+        else:
+            messages.warning(request, "Não há desfiles abertos ou confirmados")
+
+        return self.render_to_response(context)
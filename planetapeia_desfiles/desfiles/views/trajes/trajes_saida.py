@@ -3,18 +3,18 @@ from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
 from django.views.generic import TemplateView
 
 from ...roles import ALMOXARIFE
-from ..utils import NavBar, get_post_data
+from ..utils import get_post_data
 
 
 class TrajesSaida(LoginRequiredMixin, TemplateView):
     template_name = "trajes/saida.html"
 
     def get(self, request: HttpRequest, num_inventario: int) -> HttpResponse:
-        if not request.user.has_perm(ALMOXARIFE):
+        if not request.contexto.tem_permissao(ALMOXARIFE):
             return HttpResponseForbidden()
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
 
         return self.render_to_response(context)
@@ -23,7 +23,7 @@ class TrajesSaida(LoginRequiredMixin, TemplateView):
         cpf, inventario = get_post_data(request, "cpf", "inventario")
         context = {
             "header": "Gerenciamento de trajes",
-            "navbar": NavBar(request),
+            "navbar": request.contexto.navbar,
         }
 
         return self.render_to_response(context)
@@ -30,32 +30,29 @@ class Link:
 class NavBar:
     def __init__(self, request: HttpRequest):
         self.user: User = request.user
+        self.contexto = request.contexto
         self.pessoa = request.pessoa
         self.brand = f'Planetapéia{": ADM" if self.user.is_staff else ""}'
         self.localizacao = str(request.location)  # TODO: Verificar localização vazia
         self.userlinks = self.get_userlinks()
         self.is_logged = self.pessoa and self.user.is_active
-        self.user_messages = list(UserMessages(request).get_messages())
-        self.message_count = len(self.user_messages)
-        self.message_count_readen = len([m for m in self.user_messages if m.read_at])
-        self.message_count_unreaden = len(
-            [m for m in self.user_messages if not m.read_at]
-        )
+        resumo = UserMessages(request).get_resumo()
+        self.user_messages = resumo.recentes
+        self.message_count = resumo.total
+        self.message_count_readen = resumo.lidas
+        self.message_count_unreaden = resumo.total_nao_lidas
 
         self.user_messages_badge_color = "bg-info"
         self.user_messages_badge_icon = "bi-envelope"
-        for msg in self.user_messages:
-            match msg.level:
-                case UserMessageLevelChoices.ERROR:
-                    self.user_messages_badge_color = "bg-danger"
-                    self.user_messages_badge_icon = "bi-envelope-exclamation-fill"
-                    messages.warning(request, "Você tem mensagens de erro não lidas")
-                    break
-                case UserMessageLevelChoices.WARN:
-                    self.user_messages_badge_color = "bg-warning"
-                    self.user_messages_badge_icon = "bi-envelope-fill"
-                    messages.warning(request, "Você tem mensagens de alerta não lidas")
-                    break
+        match resumo.nivel_nao_lidas:
+            case UserMessageLevelChoices.ERROR:
+                self.user_messages_badge_color = "bg-danger"
+                self.user_messages_badge_icon = "bi-envelope-exclamation-fill"
+                messages.warning(request, "Você tem mensagens de erro não lidas")
+            case UserMessageLevelChoices.WARN:
+                self.user_messages_badge_color = "bg-warning"
+                self.user_messages_badge_icon = "bi-envelope-fill"
+                messages.warning(request, "Você tem mensagens de alerta não lidas")
 
         self.version = __VERSION__
         self.version_date = __VERSION_DATE__
@@ -63,7 +60,7 @@ class NavBar:
     @property
     def get_foto(self):
         if self.pessoa:
-            return self.pessoa.get_foto()
+            return self.pessoa.get_foto(64)
         # if self.user.is_active:
         #     return static("icon_admin.svg")
 
@@ -109,7 +106,7 @@ class NavBar:
         )
         if self.user.is_staff:
             links.append(Link("-"))
-            if self.user.has_perm(roles.ADM_PESSOAS):
+            if self.contexto.tem_permissao(roles.ADM_PESSOAS):
                 links.append(Link("Gestão de pessoas", "admin_roles"))
             links.extend([Link("Administração", "admin:index")])
 
@@ -10,7 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import hashlib
 import os
+import sys
+import tempfile
 from pathlib import Path
 
 import environ
@@ -121,6 +124,75 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Compartilhado entre os workers do gunicorn na mesma máquina.
+# Um diretório de cache por banco de dados: checkouts e servidores com bancos
+# diferentes não compartilham entradas (várias chaves usam apenas o pk do usuário).
+# Nos testes o cache fica em memória, sem herdar entradas de outras execuções.
+# O FileBasedCache lista o diretório inteiro a cada set (_cull, para contar as
+# entradas) e, com MAX_ENTRIES atingido, descarta entradas ao acaso: o custo de
+# cada escrita cresce com o número de arquivos. Com muitas escritas, prefira
+# DESFILES_CACHE_BACKEND=sqlite para os caches da aplicação.
+TESTING = sys.argv[1:2] == ["test"]
+_DB = DATABASES["default"]
+CACHE_SUFIXO = hashlib.sha1(
+    f"{_DB.get('HOST')}:{_DB.get('PORT')}:{_DB.get('NAME')}".encode()
+).hexdigest()[:8]
+
+if TESTING:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": env(
+                "CACHE_LOCATION",
+                default=os.path.join(
+                    tempfile.gettempdir(), f"planetapeia_desfiles_cache_{CACHE_SUFIXO}"
+                ),
+            ),
+            "TIMEOUT": 300,
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+# Caches da aplicação (desfiles.services.cache)
+# memory: por processo | django: CACHES["default"] | sqlite: arquivo local compartilhado
+# Nos testes, sempre sobre o LocMemCache de CACHES
+DESFILES_CACHE_BACKEND = (
+    "django" if TESTING else env("DESFILES_CACHE_BACKEND", default="django")
+)
+DESFILES_CACHE_SQLITE_PATH = env(
+    "DESFILES_CACHE_SQLITE_PATH",
+    default=os.path.join(
+        tempfile.gettempdir(), f"planetapeia_desfiles_cache_{CACHE_SUFIXO}.sqlite3"
+    ),
+)
+
+# Geração das miniaturas de fotos em segundo plano (desfiles.services.miniaturas)
+MINIATURAS_WORKERS = env.int("MINIATURAS_WORKERS", default=1)
+# Máximo de fotos aguardando ou em geração
+MINIATURAS_FILA = env.int("MINIATURAS_FILA", default=100)
+
+# Localização por IP
+# Backends: desfiles.services.location.IPApiBackend (ip-api.com),
+# desfiles.services.location.GeoIP2Backend (base local MaxMind, LOCATION_GEOIP_DATABASE)
+# e desfiles.services.location.LocalBackend (sem rede, para testes)
+
+LOCATION_BACKEND = env(
+    "LOCATION_BACKEND", default="desfiles.services.location.IPApiBackend"
+)
+LOCATION_GEOIP_DATABASE = env(
+    "LOCATION_GEOIP_DATABASE", default=str(BASE_DIR / "GeoLite2-City.mmdb")
+)
+LOCATION_CACHE = "default"
+LOCATION_CACHE_TTL = 24 * 60 * 60
+LOCATION_CACHE_TTL_FALHA = 10 * 60
+# Intervalo mínimo entre verificações da última localização registrada da pessoa
+LOCATION_UPDATE_INTERVAL = env.int("LOCATION_UPDATE_INTERVAL", default=30 * 60)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 